@@ -0,0 +1,261 @@
+# Benchmarks for ticket-to-ride optimizer #
+#
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import contextlib
+import numpy as np
+import functions
+
+
+def timed(fn, *args, repeat=3):
+    # best wall time of `repeat` runs, plus the last result
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def baseline_all_paths(graph, start, end, max_len):
+    # the original all_paths: recursive DFS over the dict graph, one route per
+    # color, no bounds beyond max_len and a copy of the visited set per step
+    all_paths=[]
+    def dfs(current_node, path, visited, plen):
+        visited.add(current_node)
+        for neighbor, edges in graph.graph[current_node].items():
+            for edge in edges:
+                weight = edge['weight']
+                if neighbor == end:
+                    if plen + weight <= max_len:
+                        path_with_edge = path + [(current_node, neighbor, weight, edge['type'], edge['color'])]
+                        all_paths.append({'path': path_with_edge, 'type': edge['type'], 'color': edge['color']})
+                elif neighbor not in visited and plen + weight <= max_len:
+                    path_with_edge = path + [(current_node, neighbor, weight, edge['type'], edge['color'])]
+                    dfs(neighbor, path_with_edge, visited.copy(), plen + weight)
+        visited.remove(current_node)
+    dfs(start, [], set(), 0)
+    return all_paths
+
+def deepening_shortest_path(graph, start, end):
+    # the original get_shortest_path: re-run that enumeration with max_len=1,2,3,...
+    paths=[]
+    l = 1
+    while paths==[]:
+        paths = baseline_all_paths(graph, start, end, max_len=l)
+        l += 1
+    return paths
+
+
+## get_shortest_path ## ----------------------------------------------------------
+def bench_shortest_path(count=6):
+    world = functions.initialize_world()
+    world.cache_size = 0 # time the searches, not the route cache
+    tickets = functions.initialize_world_tickets()
+    cities = world.compile(True).index
+
+    # longest tickets first, skipping ones naming cities not on the board
+    longest = [(a, b, v) for (a, b), v in sorted(tickets.tickets.items(), key=lambda x: -x[1])
+               if a in cities and b in cities][:count]
+
+    print(f"{'ticket':<12}{'len':>5}{'routes':>8}{'deepening':>12}{'dijkstra':>12}{'speedup':>10}")
+    for a, b, value in longest:
+        old_t, old = timed(deepening_shortest_path, world, a, b)
+        new_t, new = timed(world.get_shortest_path, a, b, False) # raw, one route per color like the old one
+        assert sorted(p['path'] for p in old) == sorted(p['path'] for p in new), (a, b)
+        length = sum(e[2] for e in new[0]['path'])
+        print(f"{a+'-'+b:<12}{length:>5}{len(new):>8}{old_t*1e3:>10.2f}ms{new_t*1e3:>10.2f}ms{old_t/new_t:>9.1f}x")
+
+
+## import functions ## ------------------------------------------------------------
+def bench_import_time(limit=0.5, repeat=5):
+    # cold-start guard: `import functions` in a fresh interpreter must stay under
+    # `limit` seconds and must not drag in the plotting stack
+    probe = ("import sys, time; t = time.perf_counter(); import functions; "
+             "print(time.perf_counter() - t, "
+             "any(m in sys.modules for m in ('matplotlib', 'networkx')))")
+    here = os.path.dirname(os.path.abspath(__file__))
+    best, plotting = float('inf'), False
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', probe], cwd=here, check=True,
+                             capture_output=True, text=True).stdout.split()
+        best = min(best, float(out[0]))
+        plotting = plotting or out[1]=='True'
+    print(f"import functions: {best*1e3:.1f}ms (limit {limit*1e3:.0f}ms), plotting imported: {plotting}")
+    return best <= limit and not plotting
+
+
+## suite ## -----------------------------------------------------------------------
+# Fixed workloads with machine-readable results, so two commits can be compared:
+#   python benchmark.py suite --json before.json
+#   (change things)
+#   python benchmark.py suite --json after.json --compare before.json
+# Every workload runs with the route caches off so it times the search itself.
+PAIRS = {'world': [('NYC', 'JAK', (16, 20, 24)), ('ALQ', 'SYD', (19, 21, 23))],
+         'gl': [('CHI', 'NYC', (15, 17, 19)), ('CDR', 'ALB', (18, 20, 22))]}
+SCALES = (100, 1000, 5000) # synthetic board sizes
+
+def _graph(board):
+    graph = functions.load_board(board).graph()
+    graph.cache_size = 0
+    graph.disk_cache = None
+    return graph
+
+def suite_workloads():
+    # name -> (fn, items) where items is the number of queries/routes one call handles
+    workloads = {}
+    for board, pairs in PAIRS.items():
+        graph = _graph(board)
+        for a, b, lengths in pairs:
+            for max_len in lengths:
+                for collapse in (True, False):
+                    mode = 'collapsed' if collapse else 'raw'
+                    workloads[f"all_paths/{board}/{a}-{b}/{max_len}/{mode}"] = (
+                        lambda g=graph, a=a, b=b, l=max_len, c=collapse: g.all_paths(a, b, l, collapse=c), 1)
+        a_, b_, lengths = pairs[0]
+        workloads[f"get_sorted_paths/{board}/{a_}-{b_}/{lengths[-1]}"] = (
+            lambda g=graph, a=a_, b=b_, l=lengths[-1]: g.get_sorted_paths(a, b, l), 1)
+        workloads[f"get_sorted_paths/{board}/{a_}-{b_}/{lengths[-1]}/k=10"] = (
+            lambda g=graph, a=a_, b=b_, l=lengths[-1]: g.get_sorted_paths(a, b, l, k=10), 1)
+        workloads[f"get_sorted_paths/{board}/{a_}-{b_}/{lengths[-1]}/raw/compact"] = (
+            lambda g=graph, a=a_, b=b_, l=lengths[-1]: g.get_sorted_paths(a, b, l, None, None, collapse=False, compact=True), 1)
+        workloads[f"count_routes/{board}/{a_}-{b_}/{lengths[-1] + 8}/raw"] = (
+            lambda g=graph, a=a_, b=b_, l=lengths[-1] + 8: g.count_routes(a, b, l, collapse=False), 1)
+
+        tickets = [(a, b) for a, b, _ in functions.load_board(board).tickets]
+        workloads[f"get_shortest_path/{board}/all-tickets"] = (
+            lambda g=graph, t=tickets: [g.get_shortest_path(a, b) for a, b in t], len(tickets))
+
+    # long tickets: one deep DFS vs meeting in the middle
+    world = _graph('world')
+    for a, b, max_len in (('SYD', 'EDI', 25), ('CHR', 'MAR', 25), ('TOK', 'EDI', 24)):
+        workloads[f"all_paths/world/{a}-{b}/{max_len}/raw"] = (
+            lambda a=a, b=b, l=max_len: world.all_paths(a, b, l, collapse=False), 1)
+        workloads[f"bidirectional_paths/world/{a}-{b}/{max_len}/raw"] = (
+            lambda a=a, b=b, l=max_len: world.bidirectional_paths(a, b, l, collapse=False), 1)
+        workloads[f"route_set/world/{a}-{b}/{max_len}/raw"] = (
+            lambda a=a, b=b, l=max_len: world.route_set(a, b, l, collapse=False), 1)
+        workloads[f"route_set/world/{a}-{b}/{max_len}/raw/bidirectional"] = (
+            lambda a=a, b=b, l=max_len: world.route_set(a, b, l, collapse=False, bidirectional=True), 1)
+
+    # scaling: the same query mix on synthetic boards of growing size
+    for n in SCALES:
+        board = functions.synthetic_board(n)
+        graph = board.graph()
+        graph.cache_size = 0
+        tickets = [(a, b) for a, b, _ in board.tickets[:20]]
+        a, b, value = board.tickets[0]
+        workloads[f"scaling/{n}/get_shortest_path/20-tickets"] = (
+            lambda g=graph, t=tickets: [g.get_shortest_path(a, b) for a, b in t], len(tickets))
+        workloads[f"scaling/{n}/get_sorted_paths/k=10"] = (
+            lambda g=graph, a=a, b=b, l=value+4: g.get_sorted_paths(a, b, l, None, None, k=10), 1)
+        workloads[f"scaling/{n}/all_paths/shortest+2"] = (
+            lambda g=graph, a=a, b=b, l=value+2: g.all_paths(a, b, l), 1)
+
+    world = _graph('world')
+    big = world.get_sorted_paths('ALQ', 'SYD', 23, None, None, collapse=False)
+    def print_big(routes=big):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            functions.print_sorted_paths(routes)
+    workloads["print_sorted_paths/world/ALQ-SYD/23/raw"] = (print_big, len(big))
+
+    for board in ('world', 'gl'):
+        workloads[f"graph2D/{board}"] = (lambda b=board: _draw(b), 1) # layout from the disk cache
+        workloads[f"board_layout/{board}/uncached"] = (lambda b=board: _layout(b), 1)
+
+    # one png per world ticket with its 3 best routes over the board
+    deck = [(f"{a}-{b}", world.get_sorted_paths(a, b, value + 4, None, None, k=3))
+            for a, b, value in functions.load_board('world').tickets]
+    out = os.path.join(functions.CACHE_DIR, 'bench-render')
+    workloads["render_routes/world/deck"] = (lambda: functions.render_routes('world', deck, out, seed=0), len(deck))
+    return workloads
+
+def _draw(board):
+    # spring layout plus a full Agg render, without opening a window
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import networkx as nx
+    b = functions.load_board(board)
+    fig = functions.graph2D(nx.MultiGraph(), b.cities, b.connections, b.fixed, show=False)
+    fig.canvas.draw()
+    plt.close(fig)
+
+def _layout(board):
+    import networkx as nx
+    b = functions.load_board(board)
+    graph = nx.MultiGraph()
+    for city1, city2, weight, _type, color in b.connections:
+        graph.add_edge(city1, city2, weight=weight, _type=_type, color=functions.colors[color])
+    functions.board_layout(graph, b.fixed, iterations=100, cache_dir=None)
+
+def _environment():
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=here, check=True,
+                                capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'system': platform.system(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+def run_suite(repeat=5, match=None):
+    results = {}
+    for name, (fn, items) in suite_workloads().items():
+        if match and match not in name:
+            continue
+        fn() # warm up: compiled graphs, lazy imports, layouts
+        runs = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - t0)
+        results[name] = {'best': min(runs), 'median': statistics.median(runs), 'repeat': repeat, 'items': items}
+        print(f"{name:<48}{min(runs)*1e3:>10.2f}ms{statistics.median(runs)*1e3:>10.2f}ms", file=sys.stderr)
+    return {'environment': _environment(), 'results': results}
+
+def compare(old, new, threshold=0.10):
+    # best-time ratios new/old; False if any shared workload got slower than 1+threshold
+    ok = True
+    print(f"{'workload':<48}{'old':>10}{'new':>10}{'ratio':>8}")
+    for name in sorted(set(old['results']) | set(new['results'])):
+        o, n = old['results'].get(name), new['results'].get(name)
+        if o is None or n is None:
+            print(f"{name:<48}{'-' if o is None else format(o['best']*1e3, '.2f'):>10}"
+                  f"{'-' if n is None else format(n['best']*1e3, '.2f'):>10}")
+            continue
+        ratio = n['best'] / o['best'] if o['best'] else float('inf')
+        flag = ' slower' if ratio > 1 + threshold else ' faster' if ratio < 1 - threshold else ''
+        ok = ok and ratio <= 1 + threshold
+        print(f"{name:<48}{o['best']*1e3:>10.2f}{n['best']*1e3:>10.2f}{ratio:>7.2f}x{flag}")
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ticket to Ride optimizer benchmarks.")
+    parser.add_argument('which', nargs='?', default='all', choices=['all', 'shortest', 'import', 'suite'])
+    parser.add_argument('--json', help="write suite results to this file")
+    parser.add_argument('--compare', help="suite results from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed slowdown before --compare fails")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--match', help="only run suite workloads whose name contains this")
+    args = parser.parse_args()
+    ok = True
+    if args.which in ('all', 'shortest'):
+        bench_shortest_path()
+    if args.which in ('all', 'import'):
+        ok = bench_import_time()
+    if args.which in ('all', 'suite'):
+        results = run_suite(args.repeat, args.match)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=1)
+        if args.compare:
+            with open(args.compare) as f:
+                ok = compare(json.load(f), results, args.threshold) and ok
+    sys.exit(0 if ok else 1)
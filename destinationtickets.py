@@ -1,82 +1,149 @@
+# Route queries for ticket-to-ride optimizer #
+#
+# Loads a board once and answers route queries read from stdin (or a file),
+# writing one JSON line per query as soon as it finishes:
+#
+#   echo 'NYC JAK 16' | python destinationtickets.py
+#   python destinationtickets.py --board gl --input queries.jsonl > routes.jsonl
+#
+# Enumerated routes are kept on disk (--cache-dir, see functions.RouteCache),
+# so repeated batch runs over the same queries start warm.
+#
+# A query is either "START END [MAX_LEN]" or a JSON object with keys
+# start, end and optionally max_len, max_ships, max_trains, k, mode
+# ("all" = every route up to max_len, "shortest", "k" = k shortest,
+# "pareto" = one route per non-dominated ships/trains trade-off up to max_len,
+# "count" = route counts by length and by ships/trains split, no routes).
+# A query that can't be answered gets an error line instead (an error
+# object, or "QUERY: error: ..." with --text), the rest still run, and the
+# exit status is 1.
 import os
-import csv
-import heapq
-import networkx as nx
+import sys
+import json
+import argparse
 import functions
-import numpy as np
-from mpl_toolkits.mplot3d.art3d import Line3DCollection
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 
-## get data ##
-wm = []
-wm_f = os.getcwd()+"/data/WorldMap.csv"
-with open(wm_f) as f:
-    reader = csv.reader(f)
-    for row in reader:
-        wm.append(row)
-    f.close()
 
-gl = []
-gl_f = os.getcwd()+"/data/GreatLakes.csv"
-with open(gl_f) as f:
-    reader = csv.reader(f)
-    for row in reader:
-        gl.append(row)
-    f.close()
-
-functions.nothing()
-
-
-########################################################################
-############################    WORLD MAP   ############################
-########################################################################   
-
-_worldmap = False
-
-## init ##
-worldmap = functions.initialize_world()
-ticket_list = functions.initialize_world_tickets()
-
-## show ##
-""" worldmap.display_graph() """
-""" ticket_list.print_tickets() """
-
-## route mapping ##
-start='NYC'
-end='JAK'
-max_len = 16
-max_ships = max_len
-max_trains = max_len
-
-map_routes = False
-if map_routes:
-    sorted_routes = worldmap.get_sorted_paths(start, end, max_len, max_ships, max_trains)
-    print(f"Shortest Route:")
-    functions.print_sorted_paths(sorted_routes[:1])
-    print(f"All Routes:")
-    functions.print_sorted_paths(sorted_routes)
-
-
-## Graph building and viz
-world_map_graph = nx.MultiGraph()
-world_map_graph.clear()
-gl_map_graph = nx.MultiGraph()
-gl_map_graph.clear()
-
-_2d = True
-_3d = False
-
-## 2D
-# add city nodes
-if _2d==True:
-    functions.graph2D(gl_map_graph, functions.city_gl,  functions.connections_gl, functions.fixed_gl)
-    
-
-if _3d:
-    functions.graph3D(gl_map_graph, functions.city_gl, functions.connections_gl)
-
-########################################################################
-##########################    GREAT LAKES   ############################
-########################################################################   
\ No newline at end of file
+def parse_query(line):
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        query = json.loads(line)
+    else:
+        fields = line.split()
+        if len(fields) < 2:
+            raise ValueError("expected START END [MAX_LEN]")
+        query = {'start': fields[0], 'end': fields[1]}
+        if len(fields) > 2:
+            query['max_len'] = fields[2]
+    if not isinstance(query, dict) or 'start' not in query or 'end' not in query:
+        raise ValueError("a query needs a start and an end")
+    query.setdefault('max_len', 16)
+    query.setdefault('mode', 'k' if 'k' in query else 'all')
+    for key in ('max_len', 'k', 'max_ships', 'max_trains'):
+        if key in query:
+            value = query[key]
+            if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).lstrip('-').isdigit():
+                raise ValueError(f"{key} must be an integer, got {value!r}")
+            query[key] = int(value)
+    return query
+
+def route_json(route):
+    out = {'length': route['ships'] + route['trains'], 'ships': route['ships'], 'trains': route['trains'],
+           'path': [list(step) for step in route['path']]}
+    if 'colors' in route:
+        out['colors'] = [list(c) for c in route['colors']]
+    return out
+
+def answer(graph, board, query):
+    cg = graph.compile(True)
+    start, end = (cg.lookup(query[c], board.cities) for c in ('start', 'end'))
+    for key, city in (('start', start), ('end', end)):
+        if city is None:
+            raise KeyError(f"unknown city {query[key]}")
+    start, end = cg.cities[start], cg.cities[end]
+    limits = {key: query[key] for key in ('max_ships', 'max_trains') if key in query}
+    if query['mode'] == 'shortest':
+        routes = graph.get_shortest_path(start, end)
+    elif query['mode'] == 'k':
+        routes = graph.get_sorted_paths(start, end, query['max_len'], k=query.get('k', 10), **limits)
+    elif query['mode'] == 'count':
+        routes = graph.count_routes(start, end, query['max_len'], collapse=query.get('collapse', True), **limits)
+    elif query['mode'] == 'pareto':
+        routes = graph.pareto_routes(start, end, max_len=query['max_len'], **limits)
+    elif query['mode'] == 'all':
+        routes = graph.get_sorted_paths(start, end, query['max_len'], **limits)
+    else:
+        raise ValueError(f"unknown mode {query['mode']}")
+    return routes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer Ticket to Ride route queries as JSON lines.")
+    parser.add_argument('--board', default='world', help="'world', 'gl' or a board .json (default world)")
+    parser.add_argument('--input', default='-', help="query file, '-' for stdin (default)")
+    parser.add_argument('--output', default='-', help="result file, '-' for stdout (default)")
+    parser.add_argument('--text', action='store_true', help="print routes like print_sorted_paths instead of JSON")
+    parser.add_argument('--plot', choices=['2d', '3d'], help="draw the board instead of answering queries")
+    parser.add_argument('--cache-dir', default=os.path.join(functions.CACHE_DIR, 'routes'),
+                        help="keep enumerated routes here so later runs start warm ('' = off, default .cache/routes)")
+    args = parser.parse_args(argv)
+
+    board = functions.load_board(args.board)
+    if args.plot:
+        import networkx as nx
+        if args.plot == '2d':
+            functions.graph2D(nx.MultiGraph(), board.cities, board.connections, board.fixed)
+        else:
+            functions.graph3D(nx.MultiGraph(), board.cities, board.connections)
+        return 0
+    graph = board.graph()
+    if args.cache_dir:
+        graph.disk_cache = functions.RouteCache(args.cache_dir)
+
+    src = sys.stdin if args.input == '-' else open(args.input)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    failed = 0
+    with src, out:
+        for line in src:
+            try:
+                query = parse_query(line)
+                if query is None:
+                    continue
+                routes = answer(graph, board, query)
+                if query['mode'] == 'count':
+                    result = {'query': query, 'count': sum(routes.values()), 'by_length': functions.counts_by_length(routes),
+                              'by_split': [[ships, trains, n] for (ships, trains), n in routes.items()]}
+                    if args.text:
+                        print(f"{query['start']} -> {query['end']}: {result['count']} routes", file=out)
+                        for length, n in result['by_length'].items():
+                            print(f"[{length}] {n}", file=out)
+                        print(file=out)
+                    else:
+                        out.write(json.dumps(result) + '\n')
+                elif args.text:
+                    print(f"{query['start']} -> {query['end']}:", file=out)
+                    sys.stdout, stdout = out, sys.stdout
+                    try:
+                        functions.print_sorted_paths(routes)
+                    finally:
+                        sys.stdout = stdout
+                    print(file=out)
+                else:
+                    result = {'query': query, 'count': len(routes), 'routes': [route_json(r) for r in routes]}
+                    out.write(json.dumps(result) + '\n')
+            except Exception as e: # a bad query must not end the stream
+                failed += 1
+                # KeyError's str() is the repr of its message
+                error = str(e.args[0] if isinstance(e, KeyError) and e.args else e) or type(e).__name__
+                if args.text:
+                    print(f"{line.strip()}: error: {error}", file=out)
+                    print(file=out)
+                else:
+                    out.write(json.dumps({'query': line.strip(), 'error': error}) + '\n')
+            out.flush() # stream: each answer goes out as soon as it's ready
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,568 @@
 # Helper functions for ticket-to-ride optimizer #
 # 
+import os
+import sys
+import csv
+import json
+import time
+import heapq
+import contextlib
+import multiprocessing
+from array import array
+from collections import OrderedDict
+import hashlib
 import numpy as np
-import networkx as nx
-from mpl_toolkits.mplot3d.art3d import Line3DCollection
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
+# matplotlib / networkx are imported inside graph2D / graph3D, so routing-only
+# users (batch workers, the route printer) never pay for the plotting stack
 #
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
 ## define classes ##------------------------------------------------------------------------------------
+def all_pairs_pieces(n, sources, targets, weights):
+    # n x n fewest-pieces matrix over the directed edges sources[i] -> targets[i]
+    # (inf if unreachable): Floyd-Warshall, one vectorised relaxation per pivot city
+    dist = np.full((n, n), np.inf)
+    np.fill_diagonal(dist, 0)
+    np.minimum.at(dist, (np.asarray(sources, dtype=np.intp), np.asarray(targets, dtype=np.intp)),
+                  np.asarray(weights, dtype=float))
+    for k in range(n):
+        np.minimum(dist, dist[:, k, None] + dist[None, k, :], out=dist)
+    return dist
+
+def counts_by_length(counts):
+    # {(ships, trains): count} from count_routes -> {length: count}, shortest first
+    lengths = {}
+    for (ships, trains), n in counts.items():
+        lengths[ships + trains] = lengths.get(ships + trains, 0) + n
+    return dict(sorted(lengths.items()))
+
+class CompactGraph:
+    '''
+    Frozen CSR form of a WeightedGraph used by the route searches.
+    Cities are integer ids (insertion order of the source graph) and the
+    edges leaving city i live in slots offsets[i]:offsets[i+1] of the
+    parallel neighbors/weights/types/colors arrays. Slot order matches the
+    dict order of WeightedGraph.graph so searches return routes in the
+    same order as before.
+    With collapse=True parallel connections with the same endpoints,
+    weight and type share one slot carrying all their colors (colors holds
+    the first one, slot_colors/color_masks the whole set), so a search
+    branches once per distinct connection instead of once per color.
+    The hot loops run on Python tuple mirrors of these arrays (rows,
+    edge_tuples, slot_source, reverse_slots) because NumPy scalar access
+    is slow. Those are the only per-slot Python copies: weights, types and
+    ships are read off rows / edge_tuples, and equal color sets share one
+    tuple. On the world map that is about 54 KB collapsed (69 KB raw)
+    against 87 KB for the dict graph, which WeightedGraph keeps for
+    add_edge and plotting. nbytes reports the full size, array_nbytes the
+    arrays alone.
+    '''
+    def __init__(self, graph, collapse=False):
+        self.cities = list(graph.graph)
+        self.index = {city: i for i, city in enumerate(self.cities)}
+        self.collapsed = collapse
+
+        color_names = []
+        color_index = {}
+        offsets = [0]
+        neighbors, weights, types, colors, edge_ids, slot_colors = [], [], [], [], [], []
+        undirected = {} # connection key -> connection id
+        color_sets = {} # one shared tuple per distinct color set
+        for node in self.cities:
+            for neighbor, edges in graph.graph[node].items():
+                if collapse:
+                    groups = {} # (weight, type) -> colors, first-seen order
+                    for edge in edges:
+                        groups.setdefault((edge['weight'], edge['type']), []).append(edge['color'])
+                    parallel = [(w, t, tuple(cs), (w, t)) for (w, t), cs in groups.items()]
+                else:
+                    # both directions of one add_edge sit at the same list index
+                    parallel = [(e['weight'], e['type'], (e['color'],), i) for i, e in enumerate(edges)]
+                lo, hi = sorted((self.index[node], self.index[neighbor]))
+                for w, t, cs, tag in parallel:
+                    edge_ids.append(undirected.setdefault((lo, hi, tag), len(undirected)))
+                    for c in cs:
+                        if c not in color_index:
+                            color_index[c] = len(color_names)
+                            color_names.append(c)
+                    neighbors.append(self.index[neighbor])
+                    weights.append(w)
+                    types.append(t)
+                    colors.append(color_index[cs[0]])
+                    slot_colors.append(color_sets.setdefault(cs, cs))
+            offsets.append(len(neighbors))
+        self.color_names = tuple(color_names)
+        self.slot_colors = tuple(slot_colors) # slot -> every color of the connection
+
+        self.offsets = np.array(offsets, dtype=np.int32)
+        self.neighbors = np.array(neighbors, dtype=np.int32)
+        self.weights = np.array(weights, dtype=np.int16)
+        self.types = np.array(types, dtype=np.int8)
+        self.colors = np.array(colors, dtype=np.int8)
+        self.color_masks = np.array([sum(1 << color_index[c] for c in set(cs)) for cs in slot_colors],
+                                    dtype=np.int32)
+        self.edge_ids = np.array(edge_ids, dtype=np.int32) # slot -> connection id
+
+        # python-side mirrors for the search loops (numpy scalar access is slow)
+        # rows[i] = ((neighbor, weight, ships, slot), ...) for every edge leaving i,
+        # ships being the weight for a sea edge and 0 for a land edge
+        self.rows = tuple(
+            tuple((neighbors[k], weights[k], weights[k] if types[k]==2 else 0, k)
+                  for k in range(offsets[i], offsets[i+1]))
+            for i in range(len(self.cities))
+        )
+        # slot -> id of the city the edge leaves from
+        self.slot_source = tuple(u for u in range(len(self.cities))
+                                     for _ in range(offsets[u], offsets[u+1]))
+        # slot -> the slot of the same connection walked the other way
+        backward = {(edge_ids[k], neighbors[k]): k for k in range(len(neighbors))}
+        self.reverse_slots = tuple(backward[edge_ids[k], self.slot_source[k]] for k in range(len(neighbors)))
+        # slot -> (node, neighbor, weight, type, color), shared by every route
+        self.edge_tuples = tuple(
+            (self.cities[u], self.cities[v], w, t, color_names[c])
+            for u in range(len(self.cities))
+            for v, w, t, c in zip(neighbors[offsets[u]:offsets[u+1]],
+                                  weights[offsets[u]:offsets[u+1]],
+                                  types[offsets[u]:offsets[u+1]],
+                                  colors[offsets[u]:offsets[u+1]])
+        )
+
+    def __len__(self):
+        return len(self.cities)
+
+    @property
+    def array_nbytes(self):
+        # the NumPy CSR arrays alone
+        return (self.offsets.nbytes + self.neighbors.nbytes + self.weights.nbytes
+                + self.types.nbytes + self.colors.nbytes + self.color_masks.nbytes
+                + self.edge_ids.nbytes)
+
+    @property
+    def nbytes(self):
+        # everything this object holds: the arrays plus the Python mirrors the
+        # search loops run on (rows, edge_tuples, ...), which are most of it. Shared objects are counted once; the source
+        # WeightedGraph.graph is not included.
+        seen = set()
+        def size(obj):
+            if id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            if isinstance(obj, np.ndarray):
+                return obj.nbytes
+            total = sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                total += sum(size(k) + size(v) for k, v in obj.items())
+            elif isinstance(obj, (tuple, list)):
+                total += sum(size(x) for x in obj)
+            return total
+        return sum(size(v) for v in vars(self).values())
+
+    def route(self, slots):
+        # expand a list of edge slots into the path dict used by all_paths
+        edge_tuples = self.edge_tuples
+        path = [edge_tuples[k] for k in slots]
+        ships = sum([e[2] for e in path if e[3]==2])
+        trains = sum([e[2] for e in path]) - ships
+        route = {'path': path, 'type': path[-1][3], 'color': path[-1][4], 'ships': ships, 'trains': trains}
+        if self.collapsed:
+            # color alternatives for each step of the route
+            route['colors'] = [self.slot_colors[k] for k in slots]
+        return route
+
+    def lookup(self, city, cities=None):
+        # city id for a code, or for a full name given the board's city dict
+        # (city_w / city_gl); None if the city isn't on this board
+        if city not in self.index and cities:
+            city = next((code for code, c in cities.items() if c['name']==city), city)
+        return self.index.get(city)
+
+    @property
+    def fingerprint(self):
+        # content hash of the board as searched (cities, edges, colors)
+        if getattr(self, '_fingerprint', None) is None:
+            h = hashlib.sha1(repr((self.cities, self.color_names, self.slot_colors)).encode())
+            for a in (self.offsets, self.neighbors, self.weights, self.types, self.colors):
+                h.update(a.tobytes())
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    def distances(self):
+        # all-pairs shortest piece counts as an n x n array (built once, Floyd-Warshall)
+        if getattr(self, '_distances', None) is None:
+            n = len(self.cities)
+            self._distances = all_pairs_pieces(n, np.repeat(np.arange(n), np.diff(self.offsets)),
+                                               self.neighbors, self.weights)
+        return self._distances
+
+    def dijkstra(self, src, cost='total', limit=None):
+        # shortest distance from city id src to every city id (inf if unreachable),
+        # counting all pieces, or only 'ships' / only 'trains'; with limit,
+        # cities farther than that are left at inf
+        limit = float('inf') if limit is None else limit
+        dist = [float('inf')] * len(self.cities)
+        dist[src] = 0
+        heap = [(0, src)]
+        rows = self.rows
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, w, sw, _ in rows[u]:
+                nd = d + (w if cost=='total' else sw if cost=='ships' else w - sw)
+                if nd < dist[v] and nd <= limit:
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return dist
+
+    def shortest_route(self, src, dst, banned_nodes=(), banned_slots=(), max_ships=None, max_trains=None,
+                       stats=None):
+        # one shortest route src -> dst as (length, [slots]), avoiding the given
+        # city ids and edge slots (ban both slots of a connection to drop it
+        # in both directions); None if dst can't be reached.
+        # stats: optional SearchStats to count settled cities and cut edges in
+        if max_ships is not None or max_trains is not None:
+            return self._budget_route(src, dst, banned_nodes, banned_slots, max_ships, max_trains, stats)
+        counting = stats is not None
+        dist = {src: 0}
+        prev = {} # city id -> slot used to reach it
+        heap = [(0, src)]
+        rows = self.rows
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u == dst:
+                slots = []
+                while u != src:
+                    slots.append(prev[u])
+                    u = self.slot_source[prev[u]]
+                return d, slots[::-1]
+            if d > dist[u]:
+                continue
+            if counting:
+                stats.expanded += 1
+                stats.relaxed += len(rows[u])
+            for v, w, _, slot in rows[u]:
+                if v in banned_nodes or slot in banned_slots:
+                    if counting:
+                        stats.pruned['visited'] += 1
+                    continue
+                nd = d + w
+                if nd < dist.get(v, float('inf')):
+                    dist[v] = nd
+                    prev[v] = slot
+                    heapq.heappush(heap, (nd, v))
+        return None
+
+    def _budget_route(self, src, dst, banned_nodes, banned_slots, max_ships, max_trains, stats=None):
+        '''
+        shortest_route under ship/train budgets. Plain Dijkstra can't do this
+        (the shortest way to a city may burn the budget a later leg needs),
+        so each city keeps its non-dominated (ships, trains) labels and
+        labels are settled in order of total length.
+        '''
+        max_ships = float('inf') if max_ships is None else max_ships
+        max_trains = float('inf') if max_trains is None else max_trains
+        counting = stats is not None
+        rows = self.rows
+        labels = [(src, -1, -1)] # (city id, parent label, slot)
+        pareto = {src: [(0, 0)]} # city id -> non-dominated (ships, trains)
+        heap = [(0, 0, 0)]       # (length, ships, label)
+        while heap:
+            d, ships, label = heapq.heappop(heap)
+            u = labels[label][0]
+            if u == dst:
+                slots = []
+                while labels[label][1] != -1:
+                    slots.append(labels[label][2])
+                    label = labels[label][1]
+                return d, slots[::-1]
+            if counting:
+                stats.expanded += 1
+                stats.relaxed += len(rows[u])
+            for v, w, sw, slot in rows[u]:
+                if v in banned_nodes or slot in banned_slots:
+                    if counting:
+                        stats.pruned['visited'] += 1
+                    continue
+                s, t = ships + sw, d + w - ships - sw
+                if s > max_ships or t > max_trains:
+                    if counting:
+                        stats.pruned['ships' if s > max_ships else 'trains'] += 1
+                    continue
+                front = pareto.setdefault(v, [])
+                if any(fs <= s and ft <= t for fs, ft in front):
+                    if counting:
+                        stats.pruned['dominated'] += 1
+                    continue
+                front[:] = [(fs, ft) for fs, ft in front if not (s <= fs and t <= ft)]
+                front.append((s, t))
+                labels.append((v, label, slot))
+                heapq.heappush(heap, (s + t, s, len(labels) - 1))
+        return None
+
+    def pareto_routes(self, src, dst, max_ships=None, max_trains=None, stats=None, max_len=None):
+        '''
+        The ships/trains Pareto frontier from src to dst: one route for each
+        non-dominated (ships, trains) pair, as (ships, trains, [slots]) sorted
+        by ships. Same label-setting as _budget_route, but it keeps going past
+        the first arrival. A label is dropped once another label at its city,
+        or a finished route, beats it on both counts (using the Dijkstra ship
+        and train bounds to dst), so the work follows the frontier rather
+        than the number of routes. Labels are walks, but with positive
+        weights a walk that revisits a city is always dominated. With
+        max_len only routes of at most that many pieces count (anything
+        dominating such a route is no longer, so this is the frontier
+        restricted to them).
+        '''
+        max_ships = float('inf') if max_ships is None else max_ships
+        max_trains = float('inf') if max_trains is None else max_trains
+        max_len = float('inf') if max_len is None else max_len
+        if src == dst:
+            return []
+        counting = stats is not None
+        rows = self.rows
+        ships_lb, trains_lb = self.dijkstra(dst, 'ships'), self.dijkstra(dst, 'trains')
+        labels = [(src, -1, -1, 0, 0)] # (city id, parent label, slot, ships, trains)
+        pareto = {src: {(0, 0): 0}}    # city id -> {non-dominated (ships, trains): label}
+        heap = [(0, 0, 0)]             # (length, ships, label)
+        found = []                     # (ships, trains, label) reaching dst, trains falling
+        while heap:
+            _, ships, label = heapq.heappop(heap)
+            u, _, _, ships, trains = labels[label]
+            if pareto[u].get((ships, trains)) != label:
+                continue # dominated after it was queued
+            if u == dst:
+                found.append((ships, trains, label))
+                continue
+            if counting:
+                stats.expanded += 1
+                stats.relaxed += len(rows[u])
+            for v, w, sw, slot in rows[u]:
+                s, t = ships + sw, trains + w - sw
+                if (s + ships_lb[v] > max_ships or t + trains_lb[v] > max_trains
+                        or s + ships_lb[v] + t + trains_lb[v] > max_len):
+                    if counting:
+                        stats.pruned['ships' if s + ships_lb[v] > max_ships else
+                                     'trains' if t + trains_lb[v] > max_trains else 'length'] += 1
+                    continue
+                if any(fs <= s + ships_lb[v] and ft <= t + trains_lb[v] for fs, ft, _ in found):
+                    if counting:
+                        stats.pruned['dominated'] += 1
+                    continue
+                front = pareto.setdefault(v, {})
+                if any(fs <= s and ft <= t for fs, ft in front):
+                    if counting:
+                        stats.pruned['dominated'] += 1
+                    continue
+                for point in [p for p in front if s <= p[0] and t <= p[1]]:
+                    del front[point]
+                labels.append((v, label, slot, s, t))
+                front[(s, t)] = len(labels) - 1
+                heapq.heappush(heap, (s + t, s, len(labels) - 1))
+
+        frontier = []
+        for ships, trains, label in sorted(found):
+            slots = []
+            while labels[label][1] != -1:
+                slots.append(labels[label][2])
+                label = labels[label][1]
+            frontier.append((ships, trains, slots[::-1]))
+        return frontier
+
+
+class RouteSet:
+    '''
+    Routes on one CompactGraph kept as flat arrays instead of dicts: the
+    edge slots of route i are ids[offsets[i]:offsets[i+1]] (uint16 when
+    the board allows, like RouteCache), with per-route ships/trains arrays
+    beside them. Indexing or iterating expands a route to the all_paths
+    dict on demand; sorted() and filter() only reorder or select an index
+    array, so neither builds a Python object per route. Slicing gives a
+    view sharing the same buffers.
+    '''
+    def __init__(self, cg, offsets, ids, order=None, ships=None, trains=None):
+        self.cg = cg
+        self.offsets = offsets
+        self.ids = ids
+        if ships is None:
+            n = len(offsets) - 1
+            slot_ships = np.where(cg.types == 2, cg.weights, 0).astype(np.int16)
+            ships, lengths = np.zeros(n, dtype=np.int16), np.zeros(n, dtype=np.int16)
+            if n:
+                starts = offsets[:-1].astype(np.intp)
+                ships = np.add.reduceat(slot_ships[ids], starts, dtype=np.int16)
+                lengths = np.add.reduceat(cg.weights[ids], starts, dtype=np.int16)
+            trains = lengths - ships
+        self._ships, self._trains = ships, trains # every route in the buffers
+        self.order = np.arange(len(offsets) - 1, dtype=np.int32) if order is None else order
+
+    @classmethod
+    def from_slots(cls, cg, slot_routes):
+        # build from any iterable of slot lists (e.g. the live _iter_slots buffer)
+        ids, ends = array('H' if len(cg.neighbors) < 2**16 else 'I'), array('I')
+        for slots in slot_routes:
+            ids.extend(slots)
+            ends.append(len(ids))
+        offsets = np.zeros(len(ends) + 1, dtype=np.uint32)
+        offsets[1:] = np.frombuffer(ends, dtype=np.uint32) if ends else 0
+        return cls(cg, offsets, np.frombuffer(ids, dtype=np.uint16 if ids.typecode == 'H' else np.uint32))
+
+    def _view(self, order):
+        return RouteSet(self.cg, self.offsets, self.ids, order, self._ships, self._trains)
+
+    def __len__(self):
+        return len(self.order)
+
+    @property
+    def ships(self):
+        return self._ships[self.order]
+
+    @property
+    def trains(self):
+        return self._trains[self.order]
+
+    @property
+    def lengths(self):
+        return self.ships + self.trains
+
+    def nbytes(self):
+        return self.offsets.nbytes + self.ids.nbytes + self._ships.nbytes + self._trains.nbytes + self.order.nbytes
+
+    def slots(self, i):
+        j = self.order[i]
+        return self.ids[self.offsets[j]:self.offsets[j + 1]]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._view(self.order[i])
+        return self.cg.route(self.slots(i).tolist())
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def sorted(self, key='length'):
+        # stable, like sorted() on the dicts: 'length', 'ships' or 'trains'
+        values = {'length': self.lengths, 'ships': self.ships, 'trains': self.trains}[key]
+        return self._view(self.order[np.argsort(values, kind='stable')])
+
+    def filter(self, max_len=None, max_ships=None, max_trains=None):
+        keep = np.ones(len(self), dtype=bool)
+        for limit, values in ((max_len, self.lengths), (max_ships, self.ships), (max_trains, self.trains)):
+            if limit is not None:
+                keep &= values <= limit
+        return self._view(self.order[keep])
+
+
+class SearchStats:
+    '''
+    Opt-in counters for WeightedGraph searches: set graph.stats = SearchStats()
+    and every query adds to them until reset(). hook, if given, is called as
+    hook(query, args, stats) each time a top-level query finishes.
+    expanded   cities a search stepped into (incl. the start): DFS calls, or
+               labels settled by the Dijkstra / label-setting searches
+    relaxed    connections it looked at from those cities
+    pruned     connections it refused, by reason: 'length' / 'ships' / 'trains'
+               (the Dijkstra bound says the budget can't be met), 'visited'
+               (city already on the route, or an edge Yen's algorithm has
+               ruled out) or 'dominated' (a label with fewer ships and trains
+               already exists)
+    emitted    routes produced
+    peak_depth most connections on the DFS path at once
+    phases     seconds per phase: 'cache' (LRU/disk lookups), 'bounds'
+               (Dijkstra passes), 'search', 'routes' (building route dicts), 'sort'
+    With graph.stats = None (the default) the searches skip all of this.
+    '''
+    def __init__(self, hook=None):
+        self.hook = hook
+        self._depth = 0
+        self.reset()
+
+    def reset(self):
+        self.queries = 0
+        self.expanded = 0
+        self.relaxed = 0
+        self.pruned = {'length': 0, 'ships': 0, 'trains': 0, 'visited': 0, 'dominated': 0}
+        self.emitted = 0
+        self.peak_depth = 0
+        self.phases = {}
+
+    def add_time(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    @contextlib.contextmanager
+    def query(self, name, *args):
+        # nested queries (get_sorted_paths -> all_paths) count once, as the outer one
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self.finished(name, args)
+
+    def finished(self, name, args):
+        # a top-level query is done: count it and report it
+        self.queries += 1
+        if self.hook is not None:
+            self.hook(name, args, self)
+
+    def as_dict(self):
+        return {'queries': self.queries, 'expanded': self.expanded, 'relaxed': self.relaxed,
+                'pruned': dict(self.pruned), 'emitted': self.emitted,
+                'peak_depth': self.peak_depth, 'phases': dict(self.phases)}
+
+    def __repr__(self):
+        pruned = ' '.join(f"{k}={v}" for k, v in self.pruned.items())
+        phases = ' '.join(f"{k}={v*1e3:.2f}ms" for k, v in self.phases.items())
+        return (f"SearchStats(queries={self.queries} expanded={self.expanded} relaxed={self.relaxed} "
+                f"pruned[{pruned}] emitted={self.emitted} peak_depth={self.peak_depth} phases[{phases}])")
+
+
 class WeightedGraph:
-    def __init__(self):
+    def __init__(self, cache_size=128, disk_cache=None, stats=None, cache_slots=2**20):
         self.graph={}
+        self._compact = {} # collapse flag -> CompactGraph
+        self.cache_size = cache_size # all_paths queries kept in the LRU cache (0 = off)
+        self.cache_slots = cache_slots # ...and at most this many edge slots across them (~12 MB)
+        self._route_cache = OrderedDict()
+        self._cached_slots = 0
+        self.disk_cache = disk_cache # optional RouteCache shared across runs
+        self.stats = stats # optional SearchStats, off by default
+
+    def __getstate__(self):
+        # pickled copies (e.g. evaluate_tickets workers) start with an empty route cache
+        state = self.__dict__.copy()
+        state['_route_cache'] = OrderedDict()
+        state['_cached_slots'] = 0
+        return state
+
+    def _query(self, name, *args):
+        return self.stats.query(name, *args) if self.stats is not None else contextlib.nullcontext()
+
+    def _phase(self, name):
+        return self.stats.phase(name) if self.stats is not None else contextlib.nullcontext()
+
+    def clear_cache(self):
+        self._route_cache.clear()
+        self._cached_slots = 0
+
+    def compile(self, collapse=False):
+        # build (once) the frozen array form the searches run on
+        if collapse not in self._compact:
+            self._compact[collapse] = CompactGraph(self, collapse)
+        return self._compact[collapse]
 
     def add_edge(self, node1, node2, weight, type, color):
+        self._compact = {} # graph changed, rebuild arrays on next search
+        self.clear_cache() # ...and forget every cached route set
 
         # make nodes if not there
         if node1 not in self.graph:
@@ -41,80 +591,749 @@ class WeightedGraph:
                     t = '==' if nghbr['type']==1 else '~~'
                     print(f"{node}: (t) {p}{c} {neighbor}")
     
-    def all_paths(self, start, end, max_len=16):
-        all_paths=[]
-        
-        # recurse ;)
-        def dfs(current_node, path, visited, plen):  # depth first
-            visited.add(current_node)
-
-            for neighbor, edges in self.graph[current_node].items():
-                for edge in edges:
-                    weight = edge['weight']
-                    if neighbor == end:
-                        if plen + weight <= max_len:
-                            # Append the edge to the path
-                            path_with_edge = path + [(current_node, neighbor, weight, edge['type'], edge['color'])]
-                            all_paths.append({'path': path_with_edge, 'type': edge['type'], 'color': edge['color']})
-                    elif neighbor not in visited and plen + weight <= max_len:
-                        # Append the edge to the path
-                        path_with_edge = path + [(current_node, neighbor, weight, edge['type'], edge['color'])]
-                        dfs(neighbor, path_with_edge, visited.copy(), plen + weight)
-
-            visited.remove(current_node)
-
-        dfs(start, [], set(), 0)
-
-        return all_paths
-    
-    def get_shortest_path(self, start, end):
+    def iter_paths(self, start, end, max_len=16, max_ships=None, max_trains=None, collapse=True):
+        '''
+        Yield the routes of all_paths one at a time, in the same order.
+        The DFS keeps one path/visited buffer and an explicit stack of
+        neighbor iterators, so nothing is copied until a route is emitted
+        and memory stays bounded by the depth of the search.
+        Ship and train pieces are tracked separately; a branch is cut as
+        soon as it needs more than max_ships / max_trains of either.
+        Branch and bound: one reverse Dijkstra from end gives a lower bound
+        on what is left to build from every city, and an edge is only taken
+        if plen + weight + that bound still fits max_len (likewise for the
+        ship/train budgets when they are tighter than max_len).
+        With collapse=True (default) parallel connections of the same weight
+        and type are walked once and each route lists its color options
+        under 'colors'; collapse=False yields one route per color choice.
+        With stats on, the query is reported once the generator is exhausted
+        or closed (close() it, or drop it, to stop early).
+        '''
+        cg = self.compile(collapse)
+        search = self._iter_slots(start, end, max_len, max_ships, max_trains, collapse)
+        stats = self.stats
+        if stats is None:
+            for slots in search:
+                yield cg.route(slots)
+            return
+        # a half-read generator mustn't hold stats.query open (queries run
+        # meanwhile would count as nested in it), so report it by hand, and
+        # time only the work done in here, not the caller's between routes
+        top = not stats._depth
+        try:
+            while True:
+                bounds = stats.phases.get('bounds', 0.0)
+                t0 = time.perf_counter()
+                slots = next(search, None)
+                stats.add_time('search', time.perf_counter() - t0 - (stats.phases.get('bounds', 0.0) - bounds))
+                if slots is None:
+                    return
+                with self._phase('routes'):
+                    route = cg.route(slots)
+                yield route
+        finally:
+            if top:
+                stats.finished('iter_paths', (start, end, max_len, max_ships, max_trains, collapse))
+
+    def _iter_slots(self, start, end, max_len, max_ships, max_trains, collapse):
+        # the iter_paths DFS, yielding its live slot buffer (copy it to keep it)
+        max_ships = max_len if max_ships is None else max_ships
+        max_trains = max_len if max_trains is None else max_trains
+        cg = self.compile(collapse)
+        rows = cg.rows
+        src = cg.index[start]
+        if end not in cg.index:
+            return
+        dst = cg.index[end]
+        stats = self.stats
+        counting = stats is not None
+        with self._phase('bounds'):
+            to_end = cg.dijkstra(dst)
+            ships_to_end = cg.dijkstra(dst, 'ships') if max_ships < max_len else [0] * len(cg)
+            trains_to_end = cg.dijkstra(dst, 'trains') if max_trains < max_len else [0] * len(cg)
+        if counting:
+            # counters only touch the prune/expand/emit branches, never the plain scan
+            pruned = stats.pruned
+            stats.expanded += 1
+            stats.relaxed += len(rows[src])
+
+        visited = bytearray(len(cg))
+        visited[src] = 1
+        path = []   # edge slots of the current prefix
+        nodes = []  # city ids reached by those slots
+        plens = [(0, 0)] # (prefix length, ships in it) at each depth
+        stack = [iter(rows[src])]
+        plen, ships = 0, 0
+        while stack:
+            for neighbor, weight, sw, slot in stack[-1]:
+                if (plen + weight + to_end[neighbor] > max_len
+                        or ships + sw + ships_to_end[neighbor] > max_ships
+                        or plen + weight - ships - sw + trains_to_end[neighbor] > max_trains):
+                    if counting:
+                        pruned['length' if plen + weight + to_end[neighbor] > max_len else
+                               'ships' if ships + sw + ships_to_end[neighbor] > max_ships else 'trains'] += 1
+                    continue
+                if neighbor == dst:
+                    path.append(slot)
+                    if counting:
+                        stats.emitted += 1
+                        stats.peak_depth = max(stats.peak_depth, len(path))
+                    yield path
+                    path.pop()
+                elif not visited[neighbor]:
+                    # go one level deeper, resume this iterator on the way back
+                    if counting:
+                        stats.expanded += 1
+                        stats.relaxed += len(rows[neighbor])
+                        stats.peak_depth = max(stats.peak_depth, len(path) + 1)
+                    visited[neighbor] = 1
+                    path.append(slot)
+                    nodes.append(neighbor)
+                    plen += weight
+                    ships += sw
+                    plens.append((plen, ships))
+                    stack.append(iter(rows[neighbor]))
+                    break
+                elif counting:
+                    pruned['visited'] += 1
+            else:
+                # neighbors exhausted, backtrack
+                stack.pop()
+                if nodes:
+                    visited[nodes.pop()] = 0
+                    path.pop()
+                    plens.pop()
+                    plen, ships = plens[-1]
+
+    def all_paths(self, start, end, max_len=16, max_ships=None, max_trains=None, collapse=True):
+        '''
+        Every route of iter_paths as a list. Results go through an LRU cache
+        of cache_size queries holding at most cache_slots edge slots in all
+        (larger results aren't kept): (a, b) and (b, a) share an entry (routes are
+        reversed on the way out), and a query with a smaller max_len or
+        tighter budgets is answered by filtering a cached larger one. The
+        cache holds edge slots, so every call gets fresh route dicts, in
+        the order the DFS from start would give them whichever direction
+        filled the entry. Misses then try disk_cache (a RouteCache) before
+        searching; that holds with cache_size=0 too.
+        '''
+        with self._query('all_paths', start, end, max_len, max_ships, max_trains, collapse):
+            return self._all_paths(start, end, max_len, max_ships, max_trains, collapse)
+
+    def _all_paths(self, start, end, max_len, max_ships, max_trains, collapse):
+        cg = self.compile(collapse)
+        # budgets past max_len can't bind, so compare the effective ones
+        limits = (max_len,
+                  max_len if max_ships is None else min(max_ships, max_len),
+                  max_len if max_trains is None else min(max_trains, max_len))
+        key = (min(start, end), max(start, end), collapse)
+        served = None
+        with self._phase('cache'):
+            hit = self._route_cache.get(key) if self.cache_size else None
+            if hit is not None and all(have >= want for have, want in zip(hit[0], limits)):
+                self._route_cache.move_to_end(key)
+                cached_limits, origin, slot_routes, ships, trains, _ = hit
+                if cached_limits != limits:
+                    fits = (ships + trains <= limits[0]) & (ships <= limits[1]) & (trains <= limits[2])
+                    slot_routes = [slot_routes[i] for i in np.flatnonzero(fits)]
+                if origin != start:
+                    # walk each route the other way; DFS order is the order of the slot sequences
+                    reverse = cg.reverse_slots
+                    slot_routes = sorted([reverse[k] for k in reversed(slots)] for slots in slot_routes)
+                served = slot_routes
+        if served is not None:
+            with self._phase('routes'):
+                return [cg.route(slots) for slots in served]
+
+        query = (start, end) + limits + (collapse,)
+        with self._phase('cache'):
+            slot_routes = self.disk_cache.get(cg, query) if self.disk_cache is not None else None
+        if slot_routes is None:
+            slot_routes = self._search(cg, start, end, max_len, max_ships, max_trains, collapse, slots=True)
+            if self.disk_cache is not None:
+                with self._phase('cache'):
+                    self.disk_cache.put(cg, query, slot_routes)
+        with self._phase('routes'):
+            routes = [cg.route(slots) for slots in slot_routes]
+        n = sum(map(len, slot_routes))
+        if not self.cache_size or n > self.cache_slots:
+            return routes
+        old = self._route_cache.pop(key, None)
+        if old is not None:
+            self._cached_slots -= old[-1]
+        ships = np.array([r['ships'] for r in routes], dtype=np.int16)
+        trains = np.array([r['trains'] for r in routes], dtype=np.int16)
+        self._route_cache[key] = (limits, start, list(map(tuple, slot_routes)), ships, trains, n)
+        self._cached_slots += n
+        while len(self._route_cache) > self.cache_size or self._cached_slots > self.cache_slots:
+            self._cached_slots -= self._route_cache.popitem(last=False)[1][-1]
+        return routes
+
+    def _search(self, cg, start, end, max_len, max_ships, max_trains, collapse, slots=False):
+        # run the DFS to completion: slot lists (slots=True) or route dicts
+        search = self._iter_slots(start, end, max_len, max_ships, max_trains, collapse)
+        if self.stats is None:
+            return [list(p) for p in search] if slots else [cg.route(p) for p in search]
+        # time the DFS apart from its bounds, and the route dicts apart from both
+        bounds = self.stats.phases.get('bounds', 0.0)
+        t0 = time.perf_counter()
+        slot_routes = [list(p) for p in search]
+        self.stats.add_time('search', time.perf_counter() - t0 - (self.stats.phases.get('bounds', 0.0) - bounds))
+        if slots:
+            return slot_routes
+        with self._phase('routes'):
+            return [cg.route(p) for p in slot_routes]
+
+    def bidirectional_paths(self, start, end, max_len=16, max_ships=None, max_trains=None, collapse=True):
+        '''
+        The same routes as all_paths (same set, different order), found by
+        meeting in the middle instead of one deep DFS. With H = max_len // 2,
+        every route splits uniquely at its crossing connection, the first one
+        that takes it past H pieces. The route before that is a prefix of at
+        most H pieces from start. The route after it is a suffix of at most
+        max_len - H - 1 pieces into end. Both sides are enumerated to half
+        depth (with the usual Dijkstra bounds), suffixes are indexed by
+        their first city, and each prefix + crossing connection is joined
+        with the suffixes that fit the budgets and share no city with it
+        (bitmask test). Routes of at most H pieces come straight from the
+        prefix side. start == end (closed tours) falls back to the DFS, and
+        an unknown start raises KeyError, both as in all_paths.
+        The search itself gains most on long tickets, but building the route
+        dicts takes a big share of the total here, so for large route sets
+        use route_set(..., bidirectional=True), which skips them.
+        '''
+        cg = self.compile(collapse)
+        with self._query('bidirectional_paths', start, end, max_len, max_ships, max_trains, collapse):
+            with self._phase('search'):
+                slot_routes = list(self._meet_slots(cg, start, end, max_len, max_ships, max_trains))
+            with self._phase('routes'):
+                return [cg.route(slots) for slots in slot_routes]
+
+    def _meet_slots(self, cg, start, end, max_len, max_ships, max_trains):
+        # the bidirectional_paths join, yielding each route's slots as a tuple
+        src = cg.index[start] # unknown start: KeyError, as in all_paths
+        if end not in cg.index:
+            return
+        if start == end:
+            # a closed tour has no far end to meet at: plain DFS, like all_paths
+            for slots in self._iter_slots(start, end, max_len, max_ships, max_trains, cg.collapsed):
+                yield tuple(slots)
+            return
+        max_ships = max_len if max_ships is None else max_ships
+        max_trains = max_len if max_trains is None else max_trains
+        dst = cg.index[end]
+        rows, reverse = cg.rows, cg.reverse_slots
+        half = max_len // 2
+        stats = self.stats
+        counting = stats is not None
+        with self._phase('bounds'):
+            to_end, from_start = cg.dijkstra(dst), cg.dijkstra(src)
+            ships_to_end, ships_from_start = cg.dijkstra(dst, 'ships'), cg.dijkstra(src, 'ships')
+            trains_to_end, trains_from_start = cg.dijkstra(dst, 'trains'), cg.dijkstra(src, 'trains')
+
+        # prefixes from start of at most half pieces, never touching end
+        prefixes = [] # (city, length, ships, visited mask, slots)
+        def forward(u, plen, ships, mask, slots):
+            prefixes.append((u, plen, ships, mask, slots))
+            if counting:
+                stats.expanded += 1
+                stats.relaxed += len(rows[u])
+            for v, w, sw, k in rows[u]:
+                if (plen + w + to_end[v] > max_len or ships + sw + ships_to_end[v] > max_ships
+                        or plen + w - ships - sw + trains_to_end[v] > max_trains or mask >> v & 1):
+                    if counting:
+                        stats.pruned['length' if plen + w + to_end[v] > max_len else
+                                     'ships' if ships + sw + ships_to_end[v] > max_ships else
+                                     'trains' if plen + w - ships - sw + trains_to_end[v] > max_trains else
+                                     'visited'] += 1
+                    continue
+                if v == dst:
+                    if plen + w <= half:
+                        if counting:
+                            stats.emitted += 1
+                        yield slots + (k,) # short enough to need no join
+                elif plen + w <= half:
+                    yield from forward(v, plen + w, ships + sw, mask | 1 << v, slots + (k,))
+
+        # suffixes into end of at most max_len - half - 1 pieces, never touching
+        # start, indexed by their first city
+        suffixes = {} # city -> [(length, ships, visited mask, slots)]
+        def backward(u, slen, ships, mask, slots):
+            suffixes.setdefault(u, []).append((slen, ships, mask, slots))
+            if counting:
+                stats.expanded += 1
+                stats.relaxed += len(rows[u])
+            for v, w, sw, k in rows[u]:
+                if (slen + w > max_len - half - 1 or v == src or mask >> v & 1
+                        or slen + w + from_start[v] > max_len or ships + sw + ships_from_start[v] > max_ships
+                        or slen + w - ships - sw + trains_from_start[v] > max_trains):
+                    if counting:
+                        stats.pruned['visited' if v == src or mask >> v & 1 else
+                                     'ships' if ships + sw + ships_from_start[v] > max_ships else
+                                     'trains' if slen + w - ships - sw + trains_from_start[v] > max_trains else
+                                     'length'] += 1
+                    continue
+                backward(v, slen + w, ships + sw, mask | 1 << v, (reverse[k],) + slots)
+
+        yield from forward(src, 0, 0, 1 << src, ())
+        backward(dst, 0, 0, 1 << dst, ())
+        for side in suffixes.values():
+            side.sort(key=lambda x: x[0])
+
+        for u, plen, ships, mask, slots in prefixes:
+            for v, w, sw, k in rows[u]:
+                if plen + w <= half or mask >> v & 1 or v not in suffixes:
+                    continue
+                head, head_ships, head_slots = plen + w, ships + sw, slots + (k,)
+                for slen, s_ships, s_mask, s_slots in suffixes[v]:
+                    if head + slen > max_len:
+                        break
+                    if (s_mask & mask or head_ships + s_ships > max_ships
+                            or head + slen - head_ships - s_ships > max_trains):
+                        continue
+                    if counting:
+                        stats.emitted += 1
+                    yield head_slots + s_slots
+
+    def route_set(self, start, end, max_len=16, max_ships=None, max_trains=None, collapse=True, bidirectional=False):
+        '''
+        The routes of all_paths as a RouteSet: edge-slot arrays filled
+        straight from the DFS buffer, no dict per route. Uses disk_cache
+        like all_paths (the stored format is the same) but not the LRU.
+        bidirectional=True searches as bidirectional_paths does, which pays
+        off for long tickets, then sorts the slot sequences: lexicographic
+        slot order is the DFS order, so both modes return the same RouteSet
+        and can share disk_cache entries with all_paths.
+        '''
+        cg = self.compile(collapse)
+        limits = (max_len,
+                  max_len if max_ships is None else min(max_ships, max_len),
+                  max_len if max_trains is None else min(max_trains, max_len))
+        query = (start, end) + limits + (collapse,)
+        with self._query('route_set', start, end, max_len, max_ships, max_trains, collapse):
+            with self._phase('cache'):
+                routes = self.disk_cache.get(cg, query, compact=True) if self.disk_cache is not None else None
+            if routes is None:
+                with self._phase('search'):
+                    search = (sorted(self._meet_slots(cg, start, end, max_len, max_ships, max_trains)) if bidirectional
+                              else self._iter_slots(start, end, max_len, max_ships, max_trains, collapse))
+                    routes = RouteSet.from_slots(cg, search)
+                if self.disk_cache is not None:
+                    with self._phase('cache'):
+                        self.disk_cache.put(cg, query, routes)
+        return routes
+
+    def get_shortest_path(self, start, end, collapse=True):
+        '''
+        All minimum-length routes from start to end. One Dijkstra pass from
+        each endpoint marks the edges lying on some shortest route, then a
+        DFS walks only those edges, so the cost is near-linear in the graph
+        plus the size of the answer.
+        '''
+        with self._query('get_shortest_path', start, end, collapse):
+            return self._shortest_paths(start, end, collapse)
+
+    def _shortest_paths(self, start, end, collapse):
         paths=[]
-        l = 1
-        while paths==[]:
-            paths = self.all_paths(start, end, max_len=l)
-            l += 1
+        cg = self.compile(collapse)
+        if start not in cg.index or end not in cg.index:
+            return paths
+        src, dst = cg.index[start], cg.index[end]
+        with self._phase('bounds'):
+            from_start = cg.dijkstra(src)
+            to_end = cg.dijkstra(dst)
+        best = from_start[dst]
+        if src == dst or best == float('inf'):
+            return paths
+        rows = cg.rows
+        path = []
+        stats = self.stats
+
+        def dfs(current_node, plen):
+            if stats is not None:
+                stats.expanded += 1
+                stats.relaxed += len(rows[current_node])
+                stats.peak_depth = max(stats.peak_depth, len(path) + 1)
+            for neighbor, weight, _, slot in rows[current_node]:
+                # edge is on a shortest route iff it keeps us on the optimum
+                if plen + weight + to_end[neighbor] != best or from_start[neighbor] != plen + weight:
+                    continue
+                path.append(slot)
+                if neighbor == dst:
+                    paths.append(cg.route(path))
+                else:
+                    dfs(neighbor, plen + weight)
+                path.pop()
+
+        with self._phase('search'):
+            dfs(src, 0)
+        if stats is not None:
+            stats.emitted += len(paths)
         return paths
 
 
-    def get_sorted_paths(self, start, end, max_len, max_ships=35, max_trains=33):
-        paths = self.all_paths(start, end, max_len)
-        sorted_paths = sorted(paths, key=lambda x: sum(weight for _, _, weight, _, _ in x['path']))
+    def k_shortest_routes(self, start, end, k, max_len=None, max_ships=None, max_trains=None, collapse=True):
+        '''
+        The k shortest simple routes from start to end in increasing length
+        (Yen's algorithm over the individual connections). Each new route
+        costs one spur Dijkstra per city of the previous route, so the work
+        grows with k rather than with the number of routes under max_len.
+        With ship/train budgets every spur search is budget-constrained
+        (given what its root already used), so routes that break a budget
+        are never produced.
+        '''
+        with self._query('k_shortest_routes', start, end, k, max_len, max_ships, max_trains, collapse), \
+                self._phase('search'):
+            routes = self._k_shortest(start, end, k, max_len, max_ships, max_trains, collapse)
+        if self.stats is not None:
+            self.stats.emitted += len(routes)
+        return routes
+
+    def _k_shortest(self, start, end, k, max_len, max_ships, max_trains, collapse):
+        routes=[]
+        cg = self.compile(collapse)
+        if start not in cg.index or end not in cg.index or k < 1:
+            return routes
+        src, dst = cg.index[start], cg.index[end]
+        if src == dst:
+            return routes
+        first = cg.shortest_route(src, dst, max_ships=max_ships, max_trains=max_trains, stats=self.stats)
+        if first is None:
+            return routes
+
+        slot_source, reverse, edges = cg.slot_source, cg.reverse_slots, cg.edge_tuples
+        seen = {tuple(first[1])}
+        candidates = []            # heap of (length, tiebreak, slots)
+        branches = {}              # root prefix -> slots (both ways) of connections already taken after it
+        last = first[1]
+        while True:
+            if max_len is not None and sum(edges[s][2] for s in last) > max_len:
+                break
+            routes.append(cg.route(last))
+            if len(routes) == k:
+                break
+            for i in range(len(last)):
+                branches.setdefault(tuple(last[:i]), set()).update((last[i], reverse[last[i]]))
+            root_nodes = [slot_source[s] for s in last]
+            root_ships = root_trains = 0
+            for i in range(len(last)):
+                # deviate from `last` at its i-th city, keeping the first i edges
+                root = last[:i]
+                if i:
+                    w, t = edges[last[i-1]][2:4]
+                    root_ships += w if t==2 else 0
+                    root_trains += w if t==1 else 0
+                spur = cg.shortest_route(root_nodes[i], dst, set(root_nodes[:i]), branches[tuple(root)],
+                                         None if max_ships is None else max_ships - root_ships,
+                                         None if max_trains is None else max_trains - root_trains, self.stats)
+                if spur is None:
+                    continue
+                slots = root + spur[1]
+                if tuple(slots) not in seen:
+                    seen.add(tuple(slots))
+                    length = sum(edges[s][2] for s in root) + spur[0]
+                    heapq.heappush(candidates, (length, len(seen), slots))
+            if not candidates:
+                break
+            last = heapq.heappop(candidates)[2]
+        return routes
+
+    def count_routes(self, start, end, max_len=16, max_ships=None, max_trains=None, collapse=True, by='split'):
+        '''
+        How many routes all_paths would return, without building any of them:
+        {(ships, trains): count} (by='split') or {length: count} (by='length').
+        The counting DFS memoizes each city's completions per remaining
+        budget and per visited set, where only visited cities inside the
+        budget's reach (d(city, v) + d(v, end) <= what's left) count, so
+        prefixes that leave the same situation share one sub-count. That
+        makes large max_len values feasible where enumeration runs out of
+        memory. start == end counts the closed tours, as all_paths lists them.
+        '''
+        with self._query('count_routes', start, end, max_len, max_ships, max_trains, collapse), self._phase('search'):
+            counts = self._count_routes(start, end, max_len, max_ships, max_trains, collapse)
+        return counts_by_length(counts) if by == 'length' else counts
+
+    def _count_routes(self, start, end, max_len, max_ships, max_trains, collapse):
+        cg = self.compile(collapse)
+        if start not in cg.index or end not in cg.index:
+            return {}
+        src, dst = cg.index[start], cg.index[end]
+        max_ships = max_len if max_ships is None else min(max_ships, max_len)
+        max_trains = max_len if max_trains is None else min(max_trains, max_len)
+        rows = cg.rows
+        to_end = cg.dijkstra(dst)
+        ships_to_end, trains_to_end = cg.dijkstra(dst, 'ships'), cg.dijkstra(dst, 'trains')
+        # only cities on some route of at most max_len pieces can ever be
+        # visited, and distances from a city are only needed up to max_len, so
+        # the reach sets cost one bounded Dijkstra per city the search enters
+        # rather than an all-pairs matrix of the board
+        from_start = cg.dijkstra(src, limit=max_len)
+        on_route = [v for v in range(len(cg)) if from_start[v] + to_end[v] <= max_len]
+        near = {}  # city -> bounded Dijkstra distances from it
+        reach = {} # (city, budget) -> bitmask of cities a completion could still visit
+        memo = {}  # (city, budget, ships left, trains left, relevant visited) -> {(ships, trains): n}
+        visited = 1 << src
+        stats = self.stats
+        counting = stats is not None
+
+        def count(u, left, ships_left, trains_left):
+            nonlocal visited
+            if (u, left) not in reach:
+                if u not in near:
+                    near[u] = cg.dijkstra(u, limit=max_len)
+                d = near[u]
+                reach[u, left] = sum(1 << v for v in on_route if d[v] + to_end[v] <= left)
+            key = (u, left, ships_left, trains_left, visited & reach[u, left])
+            if key in memo:
+                return memo[key]
+            if counting:
+                stats.expanded += 1
+                stats.relaxed += len(rows[u])
+            counts = {}
+            for v, w, sw, _ in rows[u]:
+                if w + to_end[v] > left or sw + ships_to_end[v] > ships_left or w - sw + trains_to_end[v] > trains_left:
+                    if counting:
+                        stats.pruned['length' if w + to_end[v] > left else
+                                     'ships' if sw + ships_to_end[v] > ships_left else 'trains'] += 1
+                    continue
+                if v == dst:
+                    counts[sw, w - sw] = counts.get((sw, w - sw), 0) + 1
+                elif counting and visited >> v & 1:
+                    stats.pruned['visited'] += 1
+                elif not visited >> v & 1:
+                    visited |= 1 << v
+                    rest = left - w
+                    for (s, t), n in count(v, rest, min(ships_left - sw, rest), min(trains_left - w + sw, rest)).items():
+                        counts[s + sw, t + w - sw] = counts.get((s + sw, t + w - sw), 0) + n
+                    visited &= ~(1 << v)
+            memo[key] = counts
+            return counts
+
+        return dict(sorted(count(src, max_len, max_ships, max_trains).items()))
+
+    def pareto_routes(self, start, end, max_ships=None, max_trains=None, collapse=True, max_len=None):
+        '''
+        One route for each non-dominated (ships, trains) trade-off between
+        start and end, fewest ships first (see CompactGraph.pareto_routes).
+        Where several routes share a trade-off only one is returned.
+        max_len, if given, leaves out routes longer than that.
+        '''
+        cg = self.compile(collapse)
+        if start not in cg.index or end not in cg.index:
+            return []
+        with self._query('pareto_routes', start, end, max_ships, max_trains, collapse, max_len), self._phase('search'):
+            frontier = cg.pareto_routes(cg.index[start], cg.index[end], max_ships, max_trains, self.stats, max_len)
+        if self.stats is not None:
+            self.stats.emitted += len(frontier)
+        return [cg.route(slots) for _, _, slots in frontier]
+
+    def get_sorted_paths(self, start, end, max_len, max_ships=35, max_trains=33, lazy=False, k=None, collapse=True,
+                         compact=False):
+        # k=N returns only the N shortest routes (see k_shortest_routes)
+        # lazy=True hands back the iter_paths generator (discovery order, not sorted)
+        # so callers like print_sorted_paths can start on the first route right away
+        # compact=True returns a sorted RouteSet (see route_set) instead of dicts
+        if compact:
+            with self._query('get_sorted_paths', start, end, max_len, max_ships, max_trains, collapse):
+                routes = self.route_set(start, end, max_len, max_ships, max_trains, collapse)
+                with self._phase('sort'):
+                    return routes.sorted()
+        if k is not None:
+            return self.k_shortest_routes(start, end, k, max_len, max_ships, max_trains, collapse)
+        if lazy:
+            return self.iter_paths(start, end, max_len, max_ships, max_trains, collapse)
+        with self._query('get_sorted_paths', start, end, max_len, max_ships, max_trains, collapse):
+            paths = self.all_paths(start, end, max_len, max_ships, max_trains, collapse)
+            with self._phase('sort'):
+                sorted_paths = sorted(paths, key=lambda x: x['ships'] + x['trains'])
         return sorted_paths
 
+    def steiner_network(self, tickets, cities=None, exact=None):
+        '''
+        Cheapest set of connections that completes every ticket in a hand,
+        sharing track between tickets where that helps. tickets is a
+        DestinationTickets or a list of (a, b) pairs, by code or (with the
+        board's city dict) by full name.
+        Exact mode (default up to 10 distinct cities, i.e. 5 tickets) runs
+        the Dreyfus-Wagner bitmask DP over the terminals on the all-pairs
+        distance matrix, then picks the best way to split the hand into
+        separately connected groups. Larger hands fall back to a
+        metric-closure MST over the terminals, expanded to real edges and
+        trimmed to the union of ticket paths (at most twice the optimum).
+        Returns {'weight', 'ships', 'trains', 'edges', 'groups', 'exact'};
+        ValueError if some ticket's cities aren't connected at all.
+        '''
+        cg = self.compile(True)
+        pairs = list(tickets.tickets) if isinstance(tickets, DestinationTickets) else list(tickets)
+        ids = []
+        for a, b in pairs:
+            for city in (a, b):
+                if cg.lookup(city, cities) is None:
+                    raise KeyError(city)
+            ids.append((cg.lookup(a, cities), cg.lookup(b, cities)))
+        pairs = [p for p, (i, j) in zip(pairs, ids) if i != j]
+        ids = [(i, j) for i, j in ids if i != j]
+        terms = list(dict.fromkeys(c for pair in ids for c in pair))
+        if exact is None:
+            exact = len(terms) <= 10
+        dist = cg.distances()
+        for (a, b), (i, j) in zip(pairs, ids):
+            if dist[i, j] == np.inf:
+                raise ValueError(f"no route connects {a} and {b}")
+
+        hops = [] # metric-closure hops (u, v) making up the network
+        groups = []
+        if ids and exact:
+            n, full = len(cg), 1 << len(terms)
+            bit = {t: 1 << i for i, t in enumerate(terms)}
+            dp = np.full((full, n), np.inf)      # dp[S][v]: tree spanning terminals S plus v
+            via = np.zeros((full, n), dtype=int) # city the last hop into v comes from
+            split = np.zeros((full, n), dtype=int)
+            for t in terms:
+                dp[bit[t]] = dist[t]
+                via[bit[t]] = t
+            for mask in range(1, full):
+                if mask & (mask - 1) == 0:
+                    continue
+                low = mask & -mask
+                best = np.full(n, np.inf)
+                arg = np.zeros(n, dtype=int)
+                sub = (mask - 1) & mask
+                while sub:
+                    if sub & low: # each unordered split once
+                        cand = dp[sub] + dp[mask ^ sub]
+                        better = cand < best
+                        best[better] = cand[better]
+                        arg[better] = sub
+                    sub = (sub - 1) & mask
+                # join the two subtrees at u, then hop u -> v
+                total = best[:, None] + dist
+                u = total.argmin(axis=0)
+                dp[mask] = total[u, np.arange(n)]
+                via[mask] = u
+                split[mask] = arg[u]
+
+            def build(mask, v):
+                u = via[mask][v]
+                if u != v:
+                    hops.append((u, v))
+                if mask & (mask - 1):
+                    sub = split[mask][v]
+                    build(sub, u)
+                    build(mask ^ sub, u)
+
+            # best partition of the hand into groups that each get one tree
+            m = len(ids)
+            tree = [0.0] * (1 << m)
+            for T in range(1, 1 << m):
+                tmask = 0
+                for i in range(m):
+                    if T >> i & 1:
+                        tmask |= bit[ids[i][0]] | bit[ids[i][1]]
+                tree[T] = (dp[tmask].min(), tmask, int(dp[tmask].argmin()))
+            forest = [0.0] * (1 << m)
+            choice = [0] * (1 << m)
+            for T in range(1, 1 << m):
+                low = T & -T
+                forest[T] = float('inf')
+                sub = T
+                while sub:
+                    if sub & low and tree[sub][0] + forest[T ^ sub] < forest[T]:
+                        forest[T] = tree[sub][0] + forest[T ^ sub]
+                        choice[T] = sub
+                    sub = (sub - 1) & T
+            T = (1 << m) - 1
+            while T:
+                _, tmask, root = tree[choice[T]]
+                build(tmask, root)
+                groups.append([pairs[i] for i in range(m) if choice[T] >> i & 1])
+                T ^= choice[T]
+        elif ids:
+            # Prim over the terminals in the metric closure
+            inside = {terms[0]}
+            while len(inside) < len(terms):
+                u, v = min(((u, v) for u in inside for v in terms if v not in inside),
+                           key=lambda uv: dist[uv[0], uv[1]])
+                hops.append((u, v))
+                inside.add(v)
+            groups.append(pairs)
+
+        # expand hops into real connections, one slot per connection
+        slots = {}
+        for u, v in hops:
+            for slot in cg.shortest_route(u, v)[1]:
+                slots.setdefault(int(cg.edge_ids[slot]), slot)
+        if not exact and ids:
+            # overlapping hops can close cycles: keep a spanning tree (Kruskal) of
+            # what was drawn, then only the edges some ticket's tree path needs
+            parent = list(range(len(cg)))
+            def root(x):
+                while parent[x] != x:
+                    parent[x] = parent[parent[x]]
+                    x = parent[x]
+                return x
+            adj = {}
+            for slot in sorted(slots.values(), key=lambda k: cg.edge_tuples[k][2]):
+                u, v = cg.slot_source[slot], cg.neighbors[slot]
+                if root(u) != root(v):
+                    parent[root(u)] = root(v)
+                    adj.setdefault(u, []).append((v, slot))
+                    adj.setdefault(v, []).append((u, slot))
+            keep = {}
+            for a, b in ids:
+                back = {a: None} # BFS over the tree from a
+                queue = [a]
+                for x in queue:
+                    for y, slot in adj.get(x, []):
+                        if y not in back:
+                            back[y] = (x, slot)
+                            queue.append(y)
+                x = b
+                while back[x] is not None:
+                    x, slot = back[x]
+                    keep[int(cg.edge_ids[slot])] = slot
+            slots = keep
+
+        edges = [cg.edge_tuples[k] for k in slots.values()]
+        ships = sum(e[2] for e in edges if e[3]==2)
+        trains = sum(e[2] for e in edges if e[3]==1)
+        return {'weight': ships + trains, 'ships': ships, 'trains': trains,
+                'edges': edges, 'groups': groups, 'exact': exact}
+
 
 def print_sorted_paths(sorted_paths):
+    # collapsed searches give one route per printed line already, but raw
+    # (collapse=False) ones repeat a line once per color choice, so skip those
     printed_paths=set()
     for path in sorted_paths:
         path_info = path['path']
-    
-        # Make new tuple disregarding color and type for no duplicate printing
-        path_tuple = tuple((node, neighbor, weight) for node, neighbor, weight, _, _ in path_info)
-        
-        if path_tuple not in printed_paths:
-            printed_paths.add(path_tuple)
-
-            # Calculate weights
-            total_weight = sum(weight for _, _, weight, _, _ in path_info)
-            ship_weight = sum(weight for _, _, weight, _type, _ in path_info if _type==2)
-            train_weight = sum(weight for _, _, weight, _type, _ in path_info if _type==1)
-            # Formatting
+        path_tuple = tuple((node, neighbor, weight, type) for node, neighbor, weight, type, _ in path_info)
+        if path_tuple in printed_paths:
+            continue
+        printed_paths.add(path_tuple)
+
+        # Calculate weights
+        total_weight = sum(weight for _, _, weight, _, _ in path_info)
+        ship_weight = sum(weight for _, _, weight, _type, _ in path_info if _type==2)
+        train_weight = sum(weight for _, _, weight, _type, _ in path_info if _type==1)
+        # Formatting
+        if ship_weight<10:
+            formatted_path = f"[{total_weight}] (~)0{ship_weight}/{train_weight}(=) >> "
+            if train_weight<10:
+                formatted_path = f"[{total_weight}] (~)0{ship_weight}/0{train_weight}(=) >> "
+        elif train_weight<10:
+            formatted_path = f"[{total_weight}] (~){ship_weight}/0{train_weight}(=) >> "
             if ship_weight<10:
-                formatted_path = f"[{total_weight}] (~)0{ship_weight}/{train_weight}(=) >> "
-                if train_weight<10:
-                    formatted_path = f"[{total_weight}] (~)0{ship_weight}/0{train_weight}(=) >> "
-            elif train_weight<10:
-                formatted_path = f"[{total_weight}] (~){ship_weight}/0{train_weight}(=) >> "
-                if ship_weight<10:
-                    formatted_path = f"[{total_weight}] (~)0{ship_weight}/0{train_weight}(=) >> "
-            else:
-                formatted_path = f"[{total_weight}] (~){ship_weight}/{train_weight}(=) >> "
+                formatted_path = f"[{total_weight}] (~)0{ship_weight}/0{train_weight}(=) >> "
+        else:
+            formatted_path = f"[{total_weight}] (~){ship_weight}/{train_weight}(=) >> "
 
-            for node, _, weight, type, _ in path_info:
-                t = f'~~{weight}~~' if type==2 else f'=={weight}=='
-                formatted_path += f"{node} {t} "
+        for node, _, weight, type, _ in path_info:
+            t = f'~~{weight}~~' if type==2 else f'=={weight}=='
+            formatted_path += f"{node} {t} "
 
-            formatted_path += path_info[-1][1] # add destination city name
-            print(formatted_path)
+        formatted_path += path_info[-1][1] # add destination city name
+        print(formatted_path)
 
 class DestinationTicket:
     def __init__(self, node1, node2, value):
@@ -135,6 +1354,182 @@ class DestinationTickets:
             print(f"[0{value}] {a} <-> {b}") if value<10 else print(f"[{value}] {a} <-> {b}")
 
 
+## ticket deck analysis ##
+_worker_graph = None
+
+def _init_ticket_worker(graph):
+    # pool initializer: each worker unpickles the (already compiled) graph once
+    global _worker_graph
+    _worker_graph = graph
+
+def _evaluate_ticket(job):
+    (a, b), value, start, end, slack = job
+    row = {'ticket': (a, b), 'value': value, 'shortest': None, 'routes': 0, 'points_per_piece': None}
+    if start is None or end is None:
+        return row # city not on this board
+    shortest = _worker_graph.get_shortest_path(start, end)
+    if not shortest:
+        return row
+    length = shortest[0]['ships'] + shortest[0]['trains']
+    row['shortest'] = length
+    row['routes'] = sum(1 for _ in _worker_graph.iter_paths(start, end, length + slack))
+    row['points_per_piece'] = value / length
+    return row
+
+def evaluate_tickets(graph, tickets, cities=None, slack=2, processes=None):
+    '''
+    Analyse a whole DestinationTickets deck on a WeightedGraph: shortest
+    length, number of distinct routes within `slack` pieces of it, and
+    points per piece of the shortest route. Tickets may name cities by code
+    or, given the board's city dict (city_w / city_gl), by full name.
+    Work is fanned out over a process pool that receives the graph once
+    per worker; processes=1 runs in this process. Returns one row dict per
+    ticket in deck order (shortest is None for cities not on the board).
+    '''
+    cg = graph.compile(True)
+    def code(city):
+        i = cg.lookup(city, cities)
+        return None if i is None else cg.cities[i]
+    jobs = [((a, b), value, code(a), code(b), slack) for (a, b), value in tickets.tickets.items()]
+
+    if processes == 1:
+        _init_ticket_worker(graph)
+        return [_evaluate_ticket(job) for job in jobs]
+    with multiprocessing.Pool(processes, initializer=_init_ticket_worker, initargs=(graph,)) as pool:
+        return pool.map(_evaluate_ticket, jobs, chunksize=max(1, len(jobs) // (4 * (processes or os.cpu_count() or 1))))
+
+def print_ticket_table(rows):
+    print(f"{'value':>5} {'len':>4} {'routes':>6} {'pts/pc':>6}  ticket")
+    for row in rows:
+        a, b = row['ticket']
+        if row['shortest'] is None:
+            print(f"{row['value']:>5} {'-':>4} {'-':>6} {'-':>6}  {a} <-> {b}")
+        else:
+            print(f"{row['value']:>5} {row['shortest']:>4} {row['routes']:>6} {row['points_per_piece']:>6.2f}  {a} <-> {b}")
+
+class DistanceMatrix:
+    '''
+    All-pairs minimum piece counts for a board, built from its connection
+    list (e.g. connections_w). total[i, j] is the fewest pieces on any
+    route, trains[i, j] / ships[i, j] the fewest train / ship pieces on any
+    route (each minimised on its own). Unreachable pairs are inf. The
+    matrices are cached in CACHE_DIR keyed by a hash of the connections,
+    so after the first run construction is a single load.
+    '''
+    def __init__(self, connections, cache_dir=CACHE_DIR):
+        key = hashlib.sha1(repr(list(connections)).encode()).hexdigest()[:16]
+        cache_file = os.path.join(cache_dir, f"distances_{key}.npz") if cache_dir else None
+
+        if cache_file and os.path.exists(cache_file):
+            with np.load(cache_file) as data:
+                self.cities = [str(c) for c in data['cities']]
+                self.total, self.trains, self.ships = data['total'], data['trains'], data['ships']
+        else:
+            self.cities = list(dict.fromkeys(c for a, b, _, _, _ in connections for c in (a, b)))
+            index = {c: i for i, c in enumerate(self.cities)}
+            n = len(self.cities)
+            ends = [(index[a], index[b]) for a, b, _, _, _ in connections]
+            sources = [i for i, j in ends] + [j for i, j in ends]
+            targets = [j for i, j in ends] + [i for i, j in ends]
+            def matrix(weights):
+                return all_pairs_pieces(n, sources, targets, weights * 2)
+            self.total = matrix([w for _, _, w, _, _ in connections])
+            self.trains = matrix([w if t==1 else 0 for _, _, w, t, _ in connections])
+            self.ships = matrix([w if t==2 else 0 for _, _, w, t, _ in connections])
+            if cache_file:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp, 'wb') as f:
+                    np.savez(f, cities=np.array(self.cities), total=self.total,
+                             trains=self.trains, ships=self.ships)
+                os.replace(tmp, cache_file) # readers never see a half-written file
+        self.index = {c: i for i, c in enumerate(self.cities)}
+
+    def pieces(self, a, b):
+        # fewest pieces needed to join a and b (None if either city is unknown)
+        if a not in self.index or b not in self.index:
+            return None
+        return self.total[self.index[a], self.index[b]]
+
+    def ticket_pieces(self, tickets):
+        # {(a, b): fewest pieces} for every ticket of a DestinationTickets
+        return {(a, b): self.pieces(a, b) for (a, b) in tickets.tickets}
+
+class RouteCache:
+    '''
+    On-disk store of enumerated route sets, shared between runs and
+    processes. Entries are keyed by the board's content hash plus the
+    query, and hold each route as the edge slots of the compiled board
+    (uint16 ids in one flat buffer + offsets), so a changed board simply
+    misses. Writes go to a temp file and are renamed into place, so
+    concurrent readers see either nothing or a whole entry. Once the
+    directory grows past max_bytes the least recently used entries go.
+    '''
+    def __init__(self, directory=os.path.join(CACHE_DIR, 'routes'), max_bytes=256 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _file(self, cg, query):
+        key = hashlib.sha1(f"{cg.fingerprint}{query!r}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, cg, query, compact=False):
+        # list of slot lists (a RouteSet with compact=True), or None on a miss
+        path = self._file(cg, query)
+        try:
+            with np.load(path) as data:
+                offsets, ids = data['offsets'], data['ids']
+            os.utime(path) # mark as recently used
+        except (OSError, ValueError, KeyError):
+            return None # missing, being evicted, or unreadable: just recompute
+        if compact:
+            return RouteSet(cg, offsets, ids)
+        ids = ids.tolist()
+        return [ids[a:b] for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+    def put(self, cg, query, slot_routes):
+        # slot_routes: list of slot lists, or a RouteSet (stored as is)
+        os.makedirs(self.directory, exist_ok=True)
+        if isinstance(slot_routes, RouteSet):
+            offsets, ids = slot_routes.offsets, slot_routes.ids
+        else:
+            offsets = np.zeros(len(slot_routes) + 1, dtype=np.uint32)
+            np.cumsum([len(r) for r in slot_routes], out=offsets[1:])
+            ids = np.fromiter((k for r in slot_routes for k in r), count=int(offsets[-1]),
+                              dtype=np.uint16 if len(cg.neighbors) < 2**16 else np.uint32)
+        path = self._file(cg, query)
+        tmp = f"{path}.{os.getpid()}.{id(slot_routes)}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, offsets=offsets, ids=ids)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        # drop least recently used entries until the directory fits max_bytes
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz'):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory) if os.path.isdir(self.directory) else ():
+            if entry.name.endswith('.npz'):
+                os.remove(entry.path)
+
+
 ## dictionary definitions ##
 type = {1:'land', 2:'sea'}
 
@@ -144,798 +1539,254 @@ colors = {# some changed for visibility
     'b':'black', 'any':'sienna', 'db':"darkslategray"
 }
 
-city_w = {
-    'AAO': {'name': 'Antarctic Ocean', 'harbor': False, 'can_harbor': False},
-    'ALQ': {'name': 'Al-Qahira', 'harbor': False, 'can_harbor': True},
-    'ANC': {'name': 'Anchorage', 'harbor': False, 'can_harbor': True},
-    'ATH': {'name': 'Athina', 'harbor': False, 'can_harbor': True},
-    'BEI': {'name': 'Beijing', 'harbor': False, 'can_harbor': False},
-    'BKK': {'name': 'Bangkok', 'harbor': False, 'can_harbor': True},
-    'BUE': {'name': 'Buenos Aires', 'harbor': False, 'can_harbor': True},
-    'CAR': {'name': 'Caracas', 'harbor': False, 'can_harbor': True},
-    'CAS': {'name': 'Casablanca', 'harbor': False, 'can_harbor': True},
-    'CMB': {'name': 'Cambridge Bay', 'harbor': False, 'can_harbor': True},
-    'CPT': {'name': 'Cape Town', 'harbor': False, 'can_harbor': True},
-    'CHR': {'name': 'Christchurch', 'harbor': False, 'can_harbor': True},
-    'DES': {'name': 'Dar Es Salaam', 'harbor': False, 'can_harbor': True},
-    'DJI': {'name': 'Djibouti', 'harbor': False, 'can_harbor': False},
-    'EDI': {'name': 'Edinburgh', 'harbor': False, 'can_harbor': True},
-    'HAM': {'name': 'Hamburg', 'harbor': False, 'can_harbor': True},
-    'HKG': {'name': 'Hong Kong', 'harbor': False, 'can_harbor': True},
-    'HON': {'name': 'Honolulu', 'harbor': False, 'can_harbor': True},
-    'JAK': {'name': 'Jakarta', 'harbor': False, 'can_harbor': True},
-    'LAH': {'name': 'Lahore', 'harbor': False, 'can_harbor': False},
-    'LAG': {'name': 'Lagos', 'harbor': False, 'can_harbor': True},
-    'LIM': {'name': 'Lima', 'harbor': False, 'can_harbor': True},
-    'LOS': {'name': 'Los Angeles', 'harbor': False, 'can_harbor': True},
-    'LUA': {'name': 'Luanda', 'harbor': False, 'can_harbor': True},
-    'MAN': {'name': 'Manila', 'harbor': False, 'can_harbor': True},
-    'MAR': {'name': 'Marseille', 'harbor': False, 'can_harbor': True},
-    'MEX': {'name': 'Mexico', 'harbor': False, 'can_harbor': True},
-    'MIA': {'name': 'Miami', 'harbor': False, 'can_harbor': True},
-    'MOS': {'name': 'Moskva', 'harbor': False, 'can_harbor': False},
-    'MUM': {'name': 'Mumbai', 'harbor': False, 'can_harbor': True},
-    'NOV': {'name': 'Novosibirsk', 'harbor': False, 'can_harbor': True},
-    'NYC': {'name': 'New York', 'harbor': False, 'can_harbor': True},
-    'PER': {'name': 'Perth', 'harbor': False, 'can_harbor': True},
-    'PET': {'name': 'Petropavlovsk', 'harbor': False, 'can_harbor': True},
-    'PTM': {'name': 'Port Moresby', 'harbor': False, 'can_harbor': True},
-    'REY': {'name': 'Reykjavik', 'harbor': False, 'can_harbor': True},
-    'RIO': {'name': 'Rio De Janeiro', 'harbor': False, 'can_harbor': True},
-    'SYD': {'name': 'Sydney', 'harbor': False, 'can_harbor': True},
-    'TOA': {'name': 'Toamasina', 'harbor': False, 'can_harbor': True},
-    'TEH': {'name': 'Tehran', 'harbor': False, 'can_harbor': False},
-    'TIK': {'name': 'Tiksi', 'harbor': False, 'can_harbor': True},
-    'TOK': {'name': 'Tokyo', 'harbor': False, 'can_harbor': True},
-    'VAL': {'name': 'Valparaiso', 'harbor': False, 'can_harbor': True},
-    'YAK': {'name': 'Yakutsk', 'harbor': False, 'can_harbor': False},
-    'VAN': {'name': 'Vancouver', 'harbor': False, 'can_harbor': True},
-    'WIN': {'name': 'Winnipeg', 'harbor': False, 'can_harbor': False}
-}
-
-connections_w = [# NA
-    ('ANC', 'VAN', 4, 1, 'db'),  
-    ('VAN', 'LOS', 1, 1, 'g'),
-    ('VAN', 'LOS', 1, 1, 'r'),
-    ('VAN', 'WIN', 2, 1, 'y'),
-    ('LOS', 'MEX', 2, 1, 'w'),
-    ('LOS', 'MEX', 2, 1, 'y'),
-    ('LOS', 'NYC', 4, 1, 'p'),
-    ('LOS', 'NYC', 4, 1, 'b'),
-    ('LOS', 'WIN', 3, 1, 'any'),  # any
-    ('WIN', 'NYC', 2, 1, 'g'),
-    ('WIN', 'CMB', 4, 1, 'b'),
-    ('MIA', 'NYC', 2, 1, 'w'),
-    ('MEX', 'CAR', 3, 1, 'r'),
-    ('MEX', 'CAR', 3, 1, 'p'),
-    ('CAR', 'LIM', 2, 1, 'y'),  
-    # SA
-    ('CAR', 'LIM', 2, 1, 'w'),
-    ('CAR', 'RIO', 4, 1, 'b'),
-    ('CAR', 'RIO', 4, 1, 'g'),
-    ('LIM', 'VAL', 2, 1, 'any'),  # any
-    ('LIM', 'VAL', 2, 1, 'any'),  # any
-    ('BUE', 'RIO', 1, 1, 'r'),
-    ('BUE', 'RIO', 1, 1, 'w'),
-    ('MAR', 'CAS', 2, 1, 'db'),  
-    # EUR
-    ('MAR', 'HAM', 1, 1, 'p'),
-    ('MAR', 'HAM', 1, 1, 'r'),
-    ('HAM', 'ATH', 2, 1, 'g'),
-    ('HAM', 'MOS', 2, 1, 'b'),
-    ('HAM', 'MOS', 2, 1, 'w'),
-    ('MUR', 'MOS', 2, 1, 'p'),
-    ('ATH', 'TEH', 2, 1, 'any'),  # any
-    ('MOS', 'TEH', 3, 1, 'r'),
-    ('MOS', 'NOV', 4, 1, 'g'),
-    ('MOS', 'NOV', 4, 1, 'y'),
-    # AFR
-    ('CAS', 'LAG', 4, 1, 'any'),  # any
-    ('CAS', 'ALQ', 3, 1, 'any'),  # any
-    ('ALQ', 'DJI', 2, 1, 'w'),
-    ('ALQ', 'DJI', 2, 1, 'r'),
-    ('ALQ', 'TEH', 1, 1, 'b'),
-    ('ALQ', 'TEH', 1, 1, 'y'),
-    ('LAG', 'LUA', 1, 1, 'p'),
-    ('LAG', 'LUA', 1, 1, 'y'),
-    ('LUA', 'DES', 4, 1, 'db'),  # db
-    ('CPT', 'LUA', 2, 1, 'any'),  # any
-    ('CPT', 'DES', 3, 1, 'g'),
-    ('CPT', 'DES', 3, 1, 'p'),
-    ('DES', 'DJI', 1, 1, 'b'),
-    ('DES', 'DJI', 1, 1, 'r'),
-    # ASIA
-    ('TEH', 'LAH', 4, 1, 'db'),  # db
-    ('TEH', 'MUM', 3, 1, 'w'),
-    ('TEH', 'MUM', 3, 1, 'p'),
-    ('NOV', 'TIK', 3, 1, 'any'),  # any
-    ('NOV', 'YAK', 3, 1, 'p'),
-    ('NOV', 'BEI', 3, 1, 'r'),
-    ('NOV', 'BEI', 3, 1, 'b'),
-    ('NOV', 'LAH', 2, 1, 'w'),
-    ('TIK', 'YAK', 1, 1, 'g'),
-    ('LAH', 'BEI', 6, 1, 'db'),  # db
-    ('LAH', 'MUM', 1, 1, 'g'),
-    ('LAH', 'MUM', 1, 1, 'b'),
-    ('MUM', 'BKK', 3, 1, 'r'),
-    ('MUM', 'BKK', 3, 1, 'y'),
-    ('YAK', 'PET', 3, 1, 'w'),
-    ('YAK', 'BEI', 3, 1, 'y'),
-    ('HKG', 'BEI', 2, 1, 'w'),
-    ('HKG', 'BEI', 2, 1, 'g'),
-    ('BKK', 'HKG', 1, 1, 'p'),
-    ('BKK', 'HKG', 1, 1, 'b'),
-    # OCE
-    ('PER', 'SYD', 2, 1, 'y'),  
-    ('PER', 'SYD', 2, 1, 'w'),
-    ('DAR', 'PER', 2, 1, 'r'),
-    ('SYD', 'DAR', 2, 1, 'g'),
-    # (Sea Connections)
-    # NA
-    ('ANC', 'CMB', 6, 2, 'b'),  
-    ('CMB', 'REY', 6, 2, 'w'),
-    ('NYC', 'REY', 6, 2, 'y'),
-    ('NYC', 'EDI', 7, 2, 'p'),
-    ('NYC', 'EDI', 7, 2, 'r'),
-    ('MIA', 'CAS', 7, 2, 'g'),
-    ('MIA', 'CAR', 2, 2, 'w'),
-    # SA
-    ('CAR', 'LAG', 7, 2, 'r'),
-    ('RIO', 'LUA', 6, 2, 'any'),  # any
-    ('RIO', 'CPT', 6, 2, 'w'),
-    ('RIO', 'CPT', 6, 2, 'b'),
-    ('BUE', 'CPT', 6, 2, 'p'),
-    ('BUE', 'CPT', 6, 2, 'y'),
-    ('VAL', 'BUE', 3, 2, 'g'),
-    # EUR
-    ('REY', 'MUR', 4, 2, 'g'),
-    ('REY', 'EDI', 2, 2, 'any'),  # any
-    ('EDI', 'HAM', 1, 2, 'y'),
-    ('EDI', 'HAM', 1, 2, 'b'),
-    ('EDI', 'MAR', 1, 2, 'w'),
-    ('EDI', 'MAR', 1, 2, 'g'),
-    ('MUR', 'TIK', 7, 2, 'r'),
-    ('MAR', 'ATH', 2, 2, 'r'),
-    ('ATH', 'ALQ', 1, 2, 'g'),
-    # AFR + AAO
-    ('DES', 'MUM', 4, 2, 'w'),
-    ('DES', 'JAK', 7, 2, 'p'),
-    ('DES', 'JAK', 7, 2, 'g'),
-    ('DES', 'TOA', 1, 2, 'y'),
-    ('CPT', 'TOA', 3, 2, 'any'),  # any
-    ('CPT', 'AAO', 5, 2, 'g'),
-    ('CPT', 'AAO', 5, 2, 'r'),
-    ('AAO', 'PER', 5, 2, 'w'),
-    ('AAO', 'PER', 5, 2, 'p'),
-    # ASIA
-    ('TIK', 'ANC', 8, 2, 'y'),
-    ('TIK', 'PET', 7, 2, 'b'),
-    ('PET', 'ANC', 3, 2, 'p'),
-    ('PET', 'TOK', 2, 2, 'any'),  # any
-    ('HKG', 'TOK', 3, 2, 'any'),  # any
-    ('HKG', 'MAN', 1, 2, 'p'),
-    ('BKK', 'JAK', 2, 2, 'r'),
-    ('BKK', 'MAN', 2, 2, 'w'),
-    ('JAK', 'PER', 3, 2, 'any'),  # any
-    ('JAK', 'DAR', 2, 2, 'b'),
-    ('JAK', 'MAN', 2, 2, 'any'),  # any
-    # OCE
-    ('MAN', 'TOK', 2, 2, 'y'),
-    ('MAN', 'HON', 5, 2, 'w'),
-    ('TOK', 'VAN', 6, 2, 'w'),
-    ('TOK', 'LOS', 7, 2, 'b'),
-    ('TOK', 'LOS', 7, 2, 'g'),
-    ('TOK', 'HON', 5, 2, 'r'),
-    ('DAR', 'PTM', 1, 2, 'r'),
-    ('PTM', 'HON', 3, 2, 'g'),
-    ('SYD', 'PTM', 3, 2, 'y'),
-    ('SYD', 'LIM', 8, 2, 'p'),
-    ('SYD', 'LIM', 8, 2, 'b'),
-    ('SYD', 'CHR', 1, 2, 'r'),
-    ('SYD', 'CHR', 1, 2, 'w'),
-    ('CHR', 'VAL', 7, 2, 'y'),
-    ('HON', 'LOS', 3, 2, 'y')]
-
-connections_gl = [
-    ('DUL', 'THU', 5, 1, 'b'),
-    ('DUL', 'WAU', 4, 1, 'g'),
-    ('DUL', 'EAU', 3, 1, 'y'),
-    ('EAU', 'CDR', 5, 1, 'p'),
-    ('EAU', 'MAD', 4, 1, 'w'),
-    ('EAU', 'WAU', 2, 1, 'any'),
-    ('WAU', 'MRQ', 4, 1, 'w'),
-    ('WAU', 'GBA', 1, 1, 'r'),
-    ('WAU', 'MIL', 4, 1, 'b'),
-    ('WAU', 'MAD', 4, 1, 'p'),
-    ('CDR', 'MAD', 3, 1, 'g'),
-    ('CDR', 'CHI', 4, 1, 'y'),
-    ('CDR', 'CHI', 4, 1, 'r'),
-    ('MAD', 'MIL', 1, 1, 'any'),
-    ('MAD', 'CHI', 3, 1, 'any'),
-    ('CHI', 'SOU', 1, 1, 'any'),
-    ('CHI', 'SOU', 1, 1, 'any'),
-    ('MAR', 'TIM', 5, 1, 'y'),
-    ('TRA', 'BAY', 3, 1, 'r'),
-    ('TRA', 'MUS', 3, 1, 'w'),
-    ('MUS', 'SOU', 3, 1, 'y'),
-    ('SOU', 'DET', 4, 1, 'b'),
-    ('SOU', 'TOL', 3, 1, 'any'),
-    ('SOU', 'TOL', 3, 1, 'p'),
-    ('BAY', 'DET', 2, 1, 'g'),
-    ('DET', 'TOR', 5, 1, 'r'),
-    ('CLE', 'NYC', 9, 1, 'any'),
-    ('TIM', 'ROU', 4, 1, 'g'),
-    ('SUD', 'SBM', 2, 1, 'any'),
-    ('SUD', 'PAR', 2, 1, 'any'),
-    ('SUD', 'TIM', 4, 1, 'w'),
-    ('SUD', 'TIM', 4, 1, 'r'),
-    ('SUD', 'OTT', 7, 1, 'g'),
-    ('SUD', 'OTT', 7, 1, 'b'),
-    ('SUD', 'ROU', 4, 1, 'p'),
-    ('TOR', 'POR', 2, 1, 'w'),
-    ('TOR', 'PAR', 2, 1, 'b'),
-    ('OTT', 'KIN', 2, 1, 'y'),
-    ('OTT', 'ROU', 7, 1, 'r'),
-    ('OTT', 'MON', 1, 1, 'any'),
-    ('OTT', 'MON', 1, 1, 'any'),
-    ('MON', 'ROU', 8, 1, 'any'),
-    ('MON', 'ALB', 5, 1, 'w'),
-    ('MON', 'ALB', 5, 1, 'g'),
-    ('SYR', 'KIN', 2, 1, 'p'),
-    ('SCR', 'SYR', 2, 1, 'w'),
-    ('SCR', 'SYR', 2, 1, 'b'),
-    ('SCR', 'BUF', 4, 1, 'any'),
-    ('SCR', 'ERI', 6, 1, 'y'),
-    ('SCR', 'ERI', 6, 1, 'p'),
-    ('SCR', 'NYC', 1, 1, 'g'),
-    ('SCR', 'NYC', 1, 1, 'r'),
-    ('THU', 'MAR', 3, 2, 'p'),
-    ('THU', 'DUL', 4, 2, 'y'),
-    ('MRQ', 'DUL', 6, 2, 'r'),
-    ('MAR', 'LKS', 2, 2, 'any'),
-    ('LKS', 'THU', 1, 2, 'any'),
-    ('LKS', 'THU', 1, 2, 'any'),
-    ('LKS', 'DUL', 5, 2, 'b'),
-    ('LKS', 'DUL', 5, 2, 'p'),
-    ('LKS', 'MAR', 2, 2, 'w'),
-    ('TRA', 'MUS', 3, 2, 'r'),
-    ('TRA', 'GBA', 3, 2, 'g'),
-    ('MIL', 'MUS', 2, 2, 'any'),
-    ('MIL', 'GBA', 3, 2, 'y'),
-    ('MIL', 'GBA', 3, 2, 'b'),
-    ('CHI', 'MUS', 3, 2, 'p'),
-    ('CHI', 'MIL', 1, 2, 'w'),
-    ('CHI', 'MIL', 1, 2, 'g'),
-    ('SSM', 'LKS', 5, 2, 'r'),
-    ('SSM', 'LKS', 5, 2, 'g'),
-    ('SSM', 'MAR', 4, 2, 'any'),
-    ('SSM', 'GBA', 6, 2, 'any'),
-    ('SSM', 'GBA', 6, 2, 'any'),
-    ('SSM', 'MRQ', 3, 2, 'any'),
-    ('SSM', 'TRA', 3, 2, 'any'),
-    ('LKH', 'SSM', 4, 2, 'w'),
-    ('LKH', 'SSM', 4, 2, 'y'),
-    ('LKH', 'BAY', 2, 2, 'any'),
-    ('LKH', 'DET', 4, 2, 'b'),
-    ('LKH', 'DET', 4, 2, 'g'),
-    ('LKH', 'POR', 1, 2, 'any'),
-    ('LKH', 'SBM', 1, 2, 'any'),
-    ('SBM', 'SSM', 3, 2, 'any'),
-    ('SBM', 'POR', 2, 2, 'any'),
-    ('SBM', 'PAR', 2, 2, 'w'),
-    ('POR', 'PAR', 2, 2, 'y'),
-    ('DET', 'TOL', 1, 2, 'any'),
-    ('DET', 'TOL', 1, 2, 'any'),
-    ('DET', 'CLE', 2, 2, 'y'),
-    ('DET', 'BUF', 6, 2, 'p'),
-    ('DET', 'BUF', 6, 2, 'w'),
-    ('CLE', 'TOL', 2, 2, 'w'),
-    ('CLE', 'TOL', 2, 2, 'r'),
-    ('CLE', 'ERI', 1, 2, 'b'),
-    ('CLE', 'ERI', 1, 2, 'g'),
-    ('KIN', 'MON', 3, 2, 'y'),
-    ('KIN', 'MON', 3, 2, 'g'),
-    ('KIN', 'TOR', 4, 2, 'b'),
-    ('KIN', 'TOR', 4, 2, 'w'),
-    ('BUF', 'TOR', 1, 2, 'any'),
-    ('BUF', 'TOR', 1, 2, 'any'),
-    ('BUF', 'ERI', 2, 2, 'any'),
-    ('BUF', 'SYR', 3, 2, 'y'),
-    ('BUF', 'SYR', 3, 2, 'r'),
-    ('ALB', 'SYR', 2, 2, 'g'),
-    ('ALB', 'SYR', 2, 2, 'p'),
-    ('ALB', 'NYC', 3, 2, 'r'),
-    ('ALB', 'NYC', 3, 2, 'b')
-]
-
-city_gl = {
-    'BAY': {'name': 'Bay City', 'harbor': False, 'can_harbor': True},
-    'SCR': {'name': 'Scranton', 'harbor': False, 'can_harbor': False},
-    'BUF': {'name': 'Buffalo', 'harbor': False, 'can_harbor': True},
-    'ALB': {'name': 'Albany', 'harbor': False, 'can_harbor': True},
-    'CDR': {'name': 'Cedar Rapids', 'harbor': False, 'can_harbor': False},
-    'CLE': {'name': 'Cleveland', 'harbor': False, 'can_harbor': True},
-    'SSM': {'name': 'Sault Ste. Marie', 'harbor': False, 'can_harbor': True},
-    'WAU': {'name': 'Wausau', 'harbor': False, 'can_harbor': False},
-    'CHI': {'name': 'Chicago', 'harbor': False, 'can_harbor': True},
-    'NYC': {'name': 'New York', 'harbor': False, 'can_harbor': True},
-    'TIM': {'name': 'Timmins', 'harbor': False, 'can_harbor': False},
-    'TOR': {'name': 'Toronto', 'harbor': False, 'can_harbor': True},
-    'MON': {'name': 'Montreal', 'harbor': False, 'can_harbor': True},
-    'DET': {'name': 'Detroit', 'harbor': False, 'can_harbor': True},
-    'OTT': {'name': 'Ottawa', 'harbor': False, 'can_harbor': False},
-    'DUL': {'name': 'Duluth', 'harbor': False, 'can_harbor': True},
-    'ROU': {'name': 'Rouyn-Noranda', 'harbor': False, 'can_harbor': False},
-    'TRA': {'name': 'Traverse City', 'harbor': False, 'can_harbor': True},
-    'EAU': {'name': 'Eau Claire', 'harbor': False, 'can_harbor': False},
-    'TOL': {'name': 'Toledo', 'harbor': False, 'can_harbor': True},
-    'GBA': {'name': 'Green Bay', 'harbor': False, 'can_harbor': True},
-    'MAD': {'name': 'Madison', 'harbor': False, 'can_harbor': False},
-    'POR': {'name': 'Port Elgin', 'harbor': False, 'can_harbor': True},
-    'MAR': {'name': 'Marathon', 'harbor': False, 'can_harbor': True},
-    'SOU': {'name': 'South Bend', 'harbor': False, 'can_harbor': False},
-    'ERI': {'name': 'Erie', 'harbor': False, 'can_harbor': True},
-    'KIN': {'name': 'Kingston', 'harbor': False, 'can_harbor': True},
-    'MIL': {'name': 'Milwaukee', 'harbor': False, 'can_harbor': True},
-    'PAR': {'name': 'Parry Sound', 'harbor': False, 'can_harbor': True},
-    'MUS': {'name': 'Muskegon', 'harbor': False, 'can_harbor': True},
-    'SYR': {'name': 'Syracuse', 'harbor': False, 'can_harbor': True},
-    'SUD': {'name': 'Sudbury', 'harbor': False, 'can_harbor': False},
-    'THU': {'name': 'Thunder Bay', 'harbor': False, 'can_harbor': True},
-    'SBM': {'name': 'South Baymouth', 'harbor': False, 'can_harbor': True},
-    'MRQ': {'name': 'Marquette', 'harbor': False, 'can_harbor': True},
-    'LKS': {'name': 'Lake Superior', 'harbor': False, 'can_harbor': False},
-    'LKH': {'name': 'Lake Huron', 'harbor': False, 'can_harbor': False}
-}
-fixed_gl = {
-    'DUL':(0,10),
-    'EAU':(0,6), 
-    'CDR':(0,1),
-    'SOU':(6,0),
-    'CHI':(5,0),
-    'TIM':(9,12), 
-    'SSM':(4,6),
-    'WAU':(3,6),  
-    'DET':(9,1),    
-    'NYC':(20,0), 
-    'MON':(20,8),
-    
+## boards ## --------------------------------------------------------------------------
+# A board is data, not code: data/<board>.json lists its cities, connections
+# and pinned plot positions and names the CSV holding its ticket deck.
+# load_board() parses and validates a definition once per process. There is
+# no compiled copy on disk: parsing the JSON and CSV is quicker than loading
+# arrays back into the Python tables, and building the search graph costs
+# the same either way.
+BOARD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+BOARDS = {'world': 'world.json', 'gl': 'greatlakes.json'}
+
+class Board:
+    def __init__(self, name, cities, connections, fixed, tickets):
+        self.name = name
+        self.cities = cities           # {code: {'name', 'harbor', 'can_harbor'}}, like city_w
+        self.connections = connections # [(a, b, weight, type, color)], like connections_w
+        self.fixed = fixed             # {code: (x, y)} pinned 2D positions, like fixed_gl
+        self.tickets = tickets         # [(a, b, value)] by city code, deck order
+
+    def graph(self):
+        board = WeightedGraph()
+        for connection in self.connections:
+            board.add_edge(*connection)
+        board.compile(True) # the collapsed form every search uses by default; raw compiles on first use
+        return board
+
+    def destination_tickets(self):
+        tix = DestinationTickets()
+        for a, b, value in self.tickets:
+            tix.add_ticket(DestinationTicket(a, b, value))
+        return tix
+
+_boards = {} # path -> Board, so each board is loaded once per process
+
+def load_board(board):
+    '''
+    Load a board by name ('world', 'gl') or by path to its JSON definition.
+    The definition is parsed and validated (ValueError listing every
+    problem) once per process.
+    '''
+    path = os.path.abspath(os.path.join(BOARD_DIR, BOARDS[board]) if board in BOARDS else board)
+    if path not in _boards:
+        with open(path, 'rb') as f:
+            _boards[path] = _parse_board(path, json.load(f))
+    return _boards[path]
+
+def _parse_board(path, definition):
+    errors = []
+    cities = {}
+    for code, city in definition.get('cities', {}).items():
+        if not isinstance(city.get('name'), str):
+            errors.append(f"city {code}: missing name")
+        cities[code] = {'name': city.get('name'), 'harbor': bool(city.get('harbor', False)),
+                        'can_harbor': bool(city.get('can_harbor', False))}
+
+    connections = []
+    for i, connection in enumerate(definition.get('connections', [])):
+        if len(connection) != 5:
+            errors.append(f"connection {i}: expected [a, b, weight, type, color], got {connection}")
+            continue
+        a, b, weight, _type, color = connection
+        for city in (a, b):
+            if city not in cities:
+                errors.append(f"connection {i}: unknown city {city}")
+        if not isinstance(weight, int) or weight < 1:
+            errors.append(f"connection {i}: weight must be a positive integer, got {weight}")
+        if _type not in type:
+            errors.append(f"connection {i}: type must be 1 (land) or 2 (sea), got {_type}")
+        if color not in colors:
+            errors.append(f"connection {i}: unknown color {color}")
+        connections.append((a, b, weight, _type, color))
+
+    fixed = {}
+    for code, xy in definition.get('fixed', {}).items():
+        if code not in cities:
+            errors.append(f"fixed position for unknown city {code}")
+        fixed[code] = tuple(xy)
+
+    # tickets: resolve codes, full names and the deck's own spellings to codes
+    names = {c['name']: code for code, c in cities.items()}
+    names.update(definition.get('aliases', {}))
+    deck = definition.get('tickets', {})
+    tickets_file = os.path.join(os.path.dirname(path), deck['file']) if deck else None
+    tickets = []
+    if tickets_file:
+        with open(tickets_file, encoding='utf-8-sig') as f:
+            for n, row in enumerate(csv.reader(f), 1):
+                if any(row[i] for i in deck.get('stop_columns', []) if i < len(row)):
+                    continue # multi-city tour, not a pair ticket
+                if len(row) < 3:
+                    errors.append(f"{deck['file']} line {n}: expected city, city, value, got {row}")
+                    continue
+                a, b = (names.get(c, c) for c in row[:2])
+                for city, raw in ((a, row[0]), (b, row[1])):
+                    if city not in cities:
+                        errors.append(f"{deck['file']} line {n}: unknown city {raw}")
+                if not row[2].isdigit():
+                    errors.append(f"{deck['file']} line {n}: bad value {row[2]}")
+                    continue
+                tickets.append((a, b, int(row[2])))
+
+    if errors:
+        raise ValueError(f"invalid board {path}:\n - " + "\n - ".join(errors))
+    return Board(definition.get('name', os.path.basename(path)), cities, connections, fixed, tickets)
+
+# the board tables as module attributes (functions.city_w etc.), loaded on first use
+_board_tables = {'city_w': ('world', 'cities'), 'connections_w': ('world', 'connections'),
+                 'city_gl': ('gl', 'cities'), 'connections_gl': ('gl', 'connections'),
+                 'fixed_gl': ('gl', 'fixed')}
+
+def __getattr__(name):
+    if name in _board_tables:
+        board, table = _board_tables[name]
+        return getattr(load_board(board), table)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-}
 
 ## initialize world ## --------------------------------------------------------------
 def initialize_world():
-    world = WeightedGraph()
-    #add_edge(node1, node2, weights, type, color)
-    
-    '''
-    Routes facing N-->S, then L -> R by continent. 
-    '''
-    _land = True
-    _sea = True
-    ## Land Connections
-    if _land:
-        # NA
-        world.add_edge('ANC', 'VAN', 4, 1, 'db') #db
-        world.add_edge('VAN', 'LOS', 1, 1, 'g')
-        world.add_edge('VAN', 'LOS', 1, 1, 'r')
-        world.add_edge('VAN', 'WIN', 2, 1, 'y')
-        world.add_edge('LOS', 'MEX', 2, 1, 'w')
-        world.add_edge('LOS', 'MEX', 2, 1, 'y')
-        world.add_edge('LOS', 'NYC', 4, 1, 'p')
-        world.add_edge('LOS', 'NYC', 4, 1, 'b')
-        world.add_edge('LOS', 'WIN', 3, 1, 'any') #any
-        world.add_edge('WIN', 'NYC', 2, 1, 'g')
-        world.add_edge('WIN', 'CMB', 4, 1, 'b')
-        world.add_edge('MIA', 'NYC', 2, 1, 'w')
-        world.add_edge('MEX', 'CAR', 3, 1, 'r')
-        world.add_edge('MEX', 'CAR', 3, 1, 'p')
-
-        # SA
-        world.add_edge('CAR', 'LIM', 2, 1, 'y')
-        world.add_edge('CAR', 'LIM', 2, 1, 'w')
-        world.add_edge('CAR', 'RIO', 4, 1, 'b')
-        world.add_edge('CAR', 'RIO', 4, 1, 'g')
-        world.add_edge('LIM', 'VAL', 2, 1, 'any') #any
-        world.add_edge('LIM', 'VAL', 2, 1, 'any') #any
-        world.add_edge('BUE', 'RIO', 1, 1, 'r')
-        world.add_edge('BUE', 'RIO', 1, 1, 'w')
-
-        # EUR
-        world.add_edge('MAR', 'CAS', 2, 1, 'db') #any
-        world.add_edge('MAR', 'HAM', 1, 1, 'p')
-        world.add_edge('MAR', 'HAM', 1, 1, 'r')
-        world.add_edge('HAM', 'ATH', 2, 1, 'g')
-        world.add_edge('HAM', 'MOS', 2, 1, 'b')
-        world.add_edge('HAM', 'MOS', 2, 1, 'w')
-        world.add_edge('MUR', 'MOS', 2, 1, 'p')
-        world.add_edge('ATH', 'TEH', 2, 1, 'any') #any
-        world.add_edge('MOS', 'TEH', 3, 1, 'r')
-        world.add_edge('MOS', 'NOV', 4, 1, 'g')
-        world.add_edge('MOS', 'NOV', 4, 1, 'y')
-
-        # AFR
-        world.add_edge('CAS', 'LAG', 4, 1, 'any') #any
-        world.add_edge('CAS', 'ALQ', 3, 1, 'any') #any
-        world.add_edge('ALQ', 'DJI', 2, 1, 'w')
-        world.add_edge('ALQ', 'DJI', 2, 1, 'r') 
-        world.add_edge('ALQ', 'TEH', 1, 1, 'b')
-        world.add_edge('ALQ', 'TEH', 1, 1, 'y')        
-        world.add_edge('LAG', 'LUA', 1, 1, 'p')
-        world.add_edge('LAG', 'LUA', 1, 1, 'y')
-        world.add_edge('LUA', 'DES', 4, 1, 'db') #db
-        world.add_edge('CPT', 'LUA', 2, 1, 'any') #any
-        world.add_edge('CPT', 'DES', 3, 1, 'g')
-        world.add_edge('CPT', 'DES', 3, 1, 'p')
-        world.add_edge('DES', 'DJI', 1, 1, 'b')
-        world.add_edge('DES', 'DJI', 1, 1, 'r')
-
-        # ASIA
-        world.add_edge('TEH', 'LAH', 4, 1, 'db') #db
-        world.add_edge('TEH', 'MUM', 3, 1, 'w')
-        world.add_edge('TEH', 'MUM', 3, 1, 'p')
-        world.add_edge('NOV', 'TIK', 3, 1, 'any') #any
-        world.add_edge('NOV', 'YAK', 3, 1, 'p')
-        world.add_edge('NOV', 'BEI', 3, 1, 'r')
-        world.add_edge('NOV', 'BEI', 3, 1, 'b')
-        world.add_edge('NOV', 'LAH', 2, 1, 'w')
-        world.add_edge('TIK', 'YAK', 1, 1, 'g')
-        world.add_edge('LAH', 'BEI', 6, 1, 'db') #db
-        world.add_edge('LAH', 'MUM', 1, 1, 'g')
-        world.add_edge('LAH', 'MUM', 1, 1, 'b')
-        world.add_edge('MUM', 'BKK', 3, 1, 'r')
-        world.add_edge('MUM', 'BKK', 3, 1, 'y')
-        world.add_edge('YAK', 'PET', 3, 1, 'w')
-        world.add_edge('YAK', 'BEI', 3, 1, 'y')
-        world.add_edge('HKG', 'BEI', 2, 1, 'w')
-        world.add_edge('HKG', 'BEI', 2, 1, 'g')
-        world.add_edge('BKK', 'HKG', 1, 1, 'p')
-        world.add_edge('BKK', 'HKG', 1, 1, 'b')
-        
-        # OCE    
-        world.add_edge('PER', 'SYD', 2, 1, 'y')
-        world.add_edge('PER', 'SYD', 2, 1, 'w')
-        world.add_edge('DAR', 'PER', 2, 1, 'r')
-        world.add_edge('SYD', 'DAR', 2, 1, 'g')
-
-    ## Sea Connections
-    if _sea:
-        # NA
-        world.add_edge('ANC', 'CMB', 6, 2, 'b')
-        world.add_edge('CMB', 'REY', 6, 2, 'w')
-        world.add_edge('NYC', 'REY', 6, 2, 'y')
-        world.add_edge('NYC', 'EDI', 7, 2, 'p')
-        world.add_edge('NYC', 'EDI', 7, 2, 'r')
-        world.add_edge('MIA', 'CAS', 7, 2, 'g')
-        world.add_edge('MIA', 'CAR', 2, 2, 'w')
-
-        # SA
-        world.add_edge('CAR', 'LAG', 7, 2, 'r')
-        world.add_edge('RIO', 'LUA', 6, 2, 'any') #any
-        world.add_edge('RIO', 'CPT', 6, 2, 'w')
-        world.add_edge('RIO', 'CPT', 6, 2, 'b')
-        world.add_edge('BUE', 'CPT', 6, 2, 'p')
-        world.add_edge('BUE', 'CPT', 6, 2, 'y')
-        world.add_edge('VAL', 'BUE', 3, 2, 'g')
-
-        # EUR
-        world.add_edge('REY', 'MUR', 4, 2, 'g')
-        world.add_edge('REY', 'EDI', 2, 2, 'any') #any
-        world.add_edge('EDI', 'HAM', 1, 2, 'y')
-        world.add_edge('EDI', 'HAM', 1, 2, 'b')
-        world.add_edge('EDI', 'MAR', 1, 2, 'w')
-        world.add_edge('EDI', 'MAR', 1, 2, 'g')
-        world.add_edge('MUR', 'TIK', 7, 2, 'r')
-        world.add_edge('MAR', 'ATH', 2, 2, 'r')
-        world.add_edge('ATH', 'ALQ', 1, 2, 'g')
-
-        # AFR
-        world.add_edge('DES', 'MUM', 4, 2, 'w')
-        world.add_edge('DES', 'JAK', 7, 2, 'p')
-        world.add_edge('DES', 'JAK', 7, 2, 'g')
-        world.add_edge('DES', 'TOA', 1, 2, 'y')
-        world.add_edge('CPT', 'TOA', 3, 2, 'any') #any
-        world.add_edge('CPT', 'AAO', 5, 2, 'g')
-        world.add_edge('CPT', 'AAO', 5, 2, 'r')
-
-        # (*) Transit Spot
-        world.add_edge('AAO', 'PER', 5, 2, 'w')
-        world.add_edge('AAO', 'PER', 5, 2, 'p')
-
-        # ASIA
-        world.add_edge('TIK', 'ANC', 8, 2, 'y')
-        world.add_edge('TIK', 'PET', 7, 2, 'b')
-        world.add_edge('PET', 'ANC', 3, 2, 'p')
-        world.add_edge('PET', 'TOK', 2, 2, 'any') #any
-        world.add_edge('HKG', 'TOK', 3, 2, 'any') #any
-        world.add_edge('HKG', 'MAN', 1, 2, 'p')
-        world.add_edge('BKK', 'JAK', 2, 2, 'r')
-        world.add_edge('BKK', 'MAN', 2, 2, 'w')
-
-        # OCE
-        world.add_edge('JAK', 'PER', 3, 2, 'any') #any
-        world.add_edge('JAK', 'DAR', 2, 2, 'b')
-        world.add_edge('JAK', 'MAN', 2, 2, 'any') #any
-        world.add_edge('MAN', 'TOK', 2, 2, 'y')
-        world.add_edge('MAN', 'HON', 5, 2, 'w')
-        world.add_edge('TOK', 'VAN', 6, 2, 'w')
-        world.add_edge('TOK', 'LOS', 7, 2, 'b')
-        world.add_edge('TOK', 'LOS', 7, 2, 'g')
-        world.add_edge('TOK', 'HON', 5, 2, 'r')
-        world.add_edge('DAR', 'PTM', 1, 2, 'r')
-        world.add_edge('PTM', 'HON', 3, 2, 'g')
-        world.add_edge('SYD', 'PTM', 3, 2, 'y')
-        world.add_edge('SYD', 'LIM', 8, 2, 'p')
-        world.add_edge('SYD', 'LIM', 8, 2, 'b')
-        world.add_edge('SYD', 'CHR', 1, 2, 'r')
-        world.add_edge('SYD', 'CHR', 1, 2, 'w')
-        world.add_edge('CHR', 'VAL', 7, 2, 'y')
-        world.add_edge('HON', 'LOS', 3, 2, 'y')
-
-    return world
+    return load_board('world').graph()
 
 def initialize_world_tickets():
-    tix = DestinationTickets()
-    # <10
-    tix.add_ticket(DestinationTicket('ALQ', 'MAR', 5))
-    tix.add_ticket(DestinationTicket('JAK', 'HKG', 5))
-    tix.add_ticket(DestinationTicket('RIO', 'VAL', 6))
-    tix.add_ticket(DestinationTicket('BEI', 'MUM', 6))
-    tix.add_ticket(DestinationTicket('SYD', 'JAK', 7))
-    tix.add_ticket(DestinationTicket('LAH', 'DJI', 7))
-    tix.add_ticket(DestinationTicket('DES', 'HAM', 8))
-    tix.add_ticket(DestinationTicket('BUE', 'MIA', 9))
-    tix.add_ticket(DestinationTicket('MIA', 'VAN', 9))
-
-    # <15
-    tix.add_ticket(DestinationTicket('LUA', 'EDI', 10))
-    tix.add_ticket(DestinationTicket('MAR', 'NYC', 10))
-    tix.add_ticket(DestinationTicket('TEH', 'LAG', 10))
-    tix.add_ticket(DestinationTicket('SYD', 'TOK', 11))
-    tix.add_ticket(DestinationTicket('DES', 'RIO', 11))
-    tix.add_ticket(DestinationTicket('TOA', 'MOS', 11))
-    tix.add_ticket(DestinationTicket('NYC', 'MEX', 11))
-    tix.add_ticket(DestinationTicket('JAK', 'LOS', 11)) 
-    tix.add_ticket(DestinationTicket('ATH', 'CAR', 12))
-    tix.add_ticket(DestinationTicket('MOS', 'MIA', 13))
-    tix.add_ticket(DestinationTicket('HKG', 'MOS', 13))
-    tix.add_ticket(DestinationTicket('EDI', 'VAN', 13))
-    tix.add_ticket(DestinationTicket('DRW', 'NOV', 13))
-    tix.add_ticket(DestinationTicket('MUM', 'REY', 13))
-    tix.add_ticket(DestinationTicket('BEI', 'HAM', 13))
-    tix.add_ticket(DestinationTicket('BEI', 'MEX', 13))
-    tix.add_ticket(DestinationTicket('PER', 'WIN', 14))
-    tix.add_ticket(DestinationTicket('BEI', 'MAR', 14))
-    tix.add_ticket(DestinationTicket('HKG', 'LAG', 14))
-    tix.add_ticket(DestinationTicket('JAK', 'LIM', 14))
-    tix.add_ticket(DestinationTicket('HAM', 'LOS', 14))
-
-    # <20
-    tix.add_ticket(DestinationTicket('RIO', 'LOS', 15))
-    tix.add_ticket(DestinationTicket('PET', 'MOS', 15))
-    tix.add_ticket(DestinationTicket('MUM', 'MEX', 15))
-    tix.add_ticket(DestinationTicket('CAR', 'MEX', 15))
-    tix.add_ticket(DestinationTicket('TOK', 'NYC', 15))    
-    tix.add_ticket(DestinationTicket('TOK', 'DES', 15))
-    tix.add_ticket(DestinationTicket('HON', 'CAS', 16))
-    tix.add_ticket(DestinationTicket('VAK', 'CAS', 16))
-    tix.add_ticket(DestinationTicket('HKG', 'EDI', 17))
-    tix.add_ticket(DestinationTicket('DES', 'LOS', 17))
-    tix.add_ticket(DestinationTicket('SYD', 'NYC', 17))
-    tix.add_ticket(DestinationTicket('PER', 'RIO', 17))
-    tix.add_ticket(DestinationTicket('HAM', 'RIO', 18))
-    tix.add_ticket(DestinationTicket('JAK', 'MAR', 18))
-    tix.add_ticket(DestinationTicket('CPT', 'NYC', 19))
-    tix.add_ticket(DestinationTicket('MUM', 'NYC', 19))
-    # <max    
-    tix.add_ticket(DestinationTicket('TOK', 'RIO', 20))
-    tix.add_ticket(DestinationTicket('TOK', 'EDI', 22))
-    tix.add_ticket(DestinationTicket('CHR', 'MAR', 23))
-    tix.add_ticket(DestinationTicket('SYD', 'EDI', 25))
-
-    return tix
+    return load_board('world').destination_tickets()
+
+def initialize_world_distances():
+    return DistanceMatrix(load_board('world').connections)
 
 ## initialize great lakes ## --------------------------------------------------------------
 def initialize_gl():
-    gl = WeightedGraph()
-    #add_edge(node1, node2, weights, type, color)
-    
-    '''
-    Routes facing N-->S, then L -> R by continent. 
-    '''
-    _land = True
-    _sea = True
-    ## Land Connections
-    if _land:
-        # West
-        gl.add_edge('DUL', 'THU', 5, 1, 'b')
-        gl.add_edge('DUL', 'WAU', 4, 1, 'g')
-        gl.add_edge('DUL', 'EAU', 3, 1, 'y')
-        gl.add_edge('EAU', 'CDR', 5, 1, 'p')
-        gl.add_edge('EAU', 'MAD', 4, 1, 'w')
-        gl.add_edge('EAU', 'WAU', 2, 1, 'any')
-        gl.add_edge('WAU', 'MRQ', 4, 1, 'w')
-        gl.add_edge('WAU', 'GBA', 1, 1, 'r')
-        gl.add_edge('WAU', 'MIL', 4, 1, 'b')
-        gl.add_edge('WAU', 'MAD', 4, 1, 'p')
-        gl.add_edge('CDR', 'MAD', 3, 1, 'g')
-        gl.add_edge('CDR', 'CHI', 4, 1, 'y')
-        gl.add_edge('CDR', 'CHI', 4, 1, 'r')
-        gl.add_edge('MAD', 'MIL', 1, 1, 'any')
-        gl.add_edge('MAD', 'CHI', 3, 1, 'any')
-        gl.add_edge('CHI', 'SOU', 1, 1, 'any')
-        gl.add_edge('CHI', 'SOU', 1, 1, 'any')
-
-        # Mid
-        gl.add_edge('MAR', 'TIM', 5, 1, 'y')
-        gl.add_edge('TRA', 'BAY', 3, 1, 'r')
-        gl.add_edge('TRA', 'MUS', 3, 1, 'w')
-        gl.add_edge('MUS', 'SOU', 3, 1, 'y')
-        gl.add_edge('SOU', 'DET', 4, 1, 'b')
-        gl.add_edge('SOU', 'TOL', 3, 1, 'any')
-        gl.add_edge('SOU', 'TOL', 3, 1, 'p')
-        gl.add_edge('BAY', 'DET', 2, 1, 'g')
-        gl.add_edge('DET', 'TOR', 5, 1, 'r')
-        gl.add_edge('CLE', 'NYC', 9, 1, 'any')
-
-        # East
-        gl.add_edge('TIM', 'ROU', 4, 1, 'g')
-        gl.add_edge('SUD', 'SBM', 2, 1, 'any')
-        gl.add_edge('SUD', 'PAR', 2, 1, 'any')
-        gl.add_edge('SUD', 'TIM', 4, 1, 'w')
-        gl.add_edge('SUD', 'TIM', 4, 1, 'r')
-        gl.add_edge('SUD', 'OTT', 7, 1, 'g')
-        gl.add_edge('SUD', 'OTT', 7, 1, 'b')
-        gl.add_edge('SUD', 'ROU', 4, 1, 'p')
-        gl.add_edge('TOR', 'POR', 2, 1, 'w')
-        gl.add_edge('TOR', 'PAR', 2, 1, 'b')
-        gl.add_edge('OTT', 'KIN', 2, 1, 'y')
-        gl.add_edge('OTT', 'ROU', 7, 1, 'r')
-        gl.add_edge('OTT', 'MON', 1, 1, 'any')
-        gl.add_edge('OTT', 'MON', 1, 1, 'any')
-        gl.add_edge('MON', 'ROU', 8, 1, 'any')
-        gl.add_edge('MON', 'ALB', 5, 1, 'w')
-        gl.add_edge('MON', 'ALB', 5, 1, 'g')
-        gl.add_edge('SYR', 'KIN', 2, 1, 'p')
-        gl.add_edge('SCR', 'SYR', 2, 1, 'w')
-        gl.add_edge('SCR', 'SYR', 2, 1, 'b')
-        gl.add_edge('SCR', 'BUF', 4, 1, 'any')
-        gl.add_edge('SCR', 'ERI', 6, 1, 'y')
-        gl.add_edge('SCR', 'ERI', 6, 1, 'p')
-        gl.add_edge('SCR', 'NYC', 1, 1, 'g')
-        gl.add_edge('SCR', 'NYC', 1, 1, 'r')
-
-    ## Lake Connections
-    if _sea:
-        # West (of SSM)
-        gl.add_edge('THU', 'MAR', 3, 2, 'p')
-        gl.add_edge('THU', 'DUL', 4, 2, 'y')
-        gl.add_edge('MRQ', 'DUL', 6, 2, 'r')
-        gl.add_edge('MAR', 'LKS', 2, 2, 'any')
-        gl.add_edge('LKS', 'THU', 1, 2, 'any')
-        gl.add_edge('LKS', 'THU', 1, 2, 'any')
-        gl.add_edge('LKS', 'DUL', 5, 2, 'b')
-        gl.add_edge('LKS', 'DUL', 5, 2, 'p')
-        gl.add_edge('LKS', 'MAR', 2, 2, 'w')
-        gl.add_edge('TRA', 'MUS', 3, 2, 'r')
-        gl.add_edge('TRA', 'GBA', 3, 2, 'g')
-        gl.add_edge('MIL', 'MUS', 2, 2, 'any')
-        gl.add_edge('MIL', 'GBA', 3, 2, 'y')
-        gl.add_edge('MIL', 'GBA', 3, 2, 'b')
-        gl.add_edge('CHI', 'MUS', 3, 2, 'p')
-        gl.add_edge('CHI', 'MIL', 1, 2, 'w')
-        gl.add_edge('CHI', 'MIL', 1, 2, 'g')
-        gl.add_edge('SSM', 'LKS', 5, 2, 'r')
-        gl.add_edge('SSM', 'LKS', 5, 2, 'g')
-        gl.add_edge('SSM', 'MAR', 4, 2, 'any')
-        gl.add_edge('SSM', 'GBA', 6, 2, 'any')
-        gl.add_edge('SSM', 'GBA', 6, 2, 'any')
-        gl.add_edge('SSM', 'MRQ', 3, 2, 'any')
-        gl.add_edge('SSM', 'TRA', 3, 2, 'any')
-
-        # East (of SSM)
-        gl.add_edge('LKH', 'SSM', 4, 2, 'w')
-        gl.add_edge('LKH', 'SSM', 4, 2, 'y')
-        gl.add_edge('LKH', 'BAY', 2, 2, 'any')
-        gl.add_edge('LKH', 'DET', 4, 2, 'b')
-        gl.add_edge('LKH', 'DET', 4, 2, 'g')
-        gl.add_edge('LKH', 'POR', 1, 2, 'any')
-        gl.add_edge('LKH', 'SBM', 1, 2, 'any')
-        gl.add_edge('SBM', 'SSM', 3, 2, 'any')
-        gl.add_edge('SBM', 'POR', 2, 2, 'any')
-        gl.add_edge('SBM', 'PAR', 2, 2, 'w')
-        gl.add_edge('POR', 'PAR', 2, 2, 'y')
-        gl.add_edge('DET', 'TOL', 1, 2, 'any')
-        gl.add_edge('DET', 'TOL', 1, 2, 'any')
-        gl.add_edge('DET', 'CLE', 2, 2, 'y')
-        gl.add_edge('DET', 'BUF', 6, 2, 'p')
-        gl.add_edge('DET', 'BUF', 6, 2, 'w')
-        gl.add_edge('CLE', 'TOL', 2, 2, 'w')
-        gl.add_edge('CLE', 'TOL', 2, 2, 'r')
-        gl.add_edge('CLE', 'ERI', 1, 2, 'b')
-        gl.add_edge('CLE', 'ERI', 1, 2, 'g')
-        gl.add_edge('KIN', 'MON', 3, 2, 'y')
-        gl.add_edge('KIN', 'MON', 3, 2, 'g')
-        gl.add_edge('KIN', 'TOR', 4, 2, 'b')
-        gl.add_edge('KIN', 'TOR', 4, 2, 'w')
-        gl.add_edge('BUF', 'TOR', 1, 2, 'any')
-        gl.add_edge('BUF', 'TOR', 1, 2, 'any')
-        gl.add_edge('BUF', 'ERI', 2, 2, 'any')
-        gl.add_edge('BUF', 'SYR', 3, 2, 'y')
-        gl.add_edge('BUF', 'SYR', 3, 2, 'r')
-        gl.add_edge('ALB', 'SYR', 2, 2, 'g')
-        gl.add_edge('ALB', 'SYR', 2, 2, 'p')
-        gl.add_edge('ALB', 'NYC', 3, 2, 'r')
-        gl.add_edge('ALB', 'NYC', 3, 2, 'b')
-
-
-    return gl
+    return load_board('gl').graph()
 
 def initialize_gl_tickets():
-    tix = DestinationTickets()
-
-    # <10
-    tix.add_ticket(DestinationTicket('Eau Claire', 'Green Bay', 3))
-    tix.add_ticket(DestinationTicket('Erie', 'Kingston', 4))
-    tix.add_ticket(DestinationTicket('Buffalo', 'Albany', 4))
-    tix.add_ticket(DestinationTicket('Cleveland', 'Toronto', 4))
-    tix.add_ticket(DestinationTicket('Erie', 'Kingston', 4))
-    tix.add_ticket(DestinationTicket('Sault Ste. Marie', 'Sudbury', 4))
-    tix.add_ticket(DestinationTicket('South Baymouth', 'Detroit', 4))
-    tix.add_ticket(DestinationTicket('Port Elgin', 'Kingston', 5))
-    tix.add_ticket(DestinationTicket('Syracuse', 'Montreal', 5))
-    tix.add_ticket(DestinationTicket('Syracuse', 'New York', 5))
-    tix.add_ticket(DestinationTicket('Toronto', 'Ottawa', 5))
-    tix.add_ticket(DestinationTicket('Green Bay', 'Chicago', 5))
-    tix.add_ticket(DestinationTicket('Chicago', 'Detroit', 6))
-    tix.add_ticket(DestinationTicket('Perry Sound', 'Rouyn-Noranda', 6))
-    tix.add_ticket(DestinationTicket('Traverse City', 'Toledo', 6))
-    tix.add_ticket(DestinationTicket('Muskegon', 'Bay City', 6))
-    tix.add_ticket(DestinationTicket('Cleveland', 'Ottawa', 7))
-    tix.add_ticket(DestinationTicket('Cedar Rapids', 'Wausau', 7))
-    tix.add_ticket(DestinationTicket('Milwaukee', 'Erie', 7))
-    tix.add_ticket(DestinationTicket('Duluth', 'Traverse City', 7))
-    tix.add_ticket(DestinationTicket('Marquette', 'Buffalo', 8))
-    tix.add_ticket(DestinationTicket('Milwaukee', 'Perry Sound', 8))
-    tix.add_ticket(DestinationTicket('Milwaukee', 'Marquette', 8))
-    tix.add_ticket(DestinationTicket('Sault Ste. Marie', 'Syracuse', 8))
-    tix.add_ticket(DestinationTicket('Toledo', 'Scranton', 8))
-    tix.add_ticket(DestinationTicket('Montreal', 'New York', 9))
-    tix.add_ticket(DestinationTicket('Thunder Bay', 'Toronto', 9))
-    tix.add_ticket(DestinationTicket('South Bend', 'Syracuse', 9))
-    tix.add_ticket(DestinationTicket('Muskegon', 'Buffalo', 9))
-    tix.add_ticket(DestinationTicket('Bay City', 'Scranton', 9))
-    tix.add_ticket(DestinationTicket('Green Bay', 'Toronto', 9))
- 
-    # <20   
-    tix.add_ticket(DestinationTicket('Duluth', 'Chicago', 10))
-    tix.add_ticket(DestinationTicket('Cedar Rapids', 'Sault Ste. Marie', 10))
-    tix.add_ticket(DestinationTicket('Marathon', 'Cleveland', 10))
-    tix.add_ticket(DestinationTicket('Madison', 'Port Elgin', 10))
-    tix.add_ticket(DestinationTicket('Wausau', 'Sudbury', 10))
-    tix.add_ticket(DestinationTicket('Marquette', 'Albany', 10))
-    tix.add_ticket(DestinationTicket('Chicago', 'Toronto', 11))
-    tix.add_ticket(DestinationTicket('Cedar Rapids', 'Cleveland', 11))
-    tix.add_ticket(DestinationTicket('Marathon', 'South Bend', 11))
-    tix.add_ticket(DestinationTicket('Detroit', 'Montreal', 11))
-    tix.add_ticket(DestinationTicket('Sudbury', 'New York', 12))
-    tix.add_ticket(DestinationTicket('Detroit', 'New York', 12))
-    tix.add_ticket(DestinationTicket('Duluth', 'Detroit', 12))
-    tix.add_ticket(DestinationTicket('Eau Claire', 'Toledo', 12))
-    tix.add_ticket(DestinationTicket('Green Bay', 'Timmins', 13))
-    tix.add_ticket(DestinationTicket('Sault Ste. Marie', 'Montreal', 13))
-    tix.add_ticket(DestinationTicket('Duluth', 'Rouyn-Noranda', 14))
-    tix.add_ticket(DestinationTicket('Chicago', 'New York', 15))
-    tix.add_ticket(DestinationTicket('Chicago', 'Timmins', 15))
-    tix.add_ticket(DestinationTicket('Chicago', 'Montreal', 16))
-    tix.add_ticket(DestinationTicket('Cedar Rapids', 'Albany', 16))
-    tix.add_ticket(DestinationTicket('Thunder Bay', 'Ottawa', 17))
-    tix.add_ticket(DestinationTicket('Madison', 'Ottawa', 18))
-    tix.add_ticket(DestinationTicket('Duluth', 'Montreal', 19))
-    # <max
-    tix.add_ticket(DestinationTicket('Duluth', 'New York', 24))
-
-    return tix
+    return load_board('gl').destination_tickets()
+
+def initialize_gl_distances():
+    return DistanceMatrix(load_board('gl').connections)
+
+
+## synthetic boards ## --------------------------------------------------------------
+def synthetic_board(n_cities, seed=0, n_tickets=None, degree=3, sea=0.45, parallel=0.38):
+    '''
+    A random Ticket to Ride-like board with n_cities cities, for scaling
+    tests. Cities are scattered on a unit square and joined to their
+    `degree` nearest neighbours (plus whatever links keep the board
+    connected), so most have 3-6 neighbours like the real boards. About
+    `sea` of the connections are sea routes (more likely on long hops, and
+    longer in pieces), about `parallel` of the city pairs get a second,
+    differently colored connection, and the deck holds n_tickets tickets
+    (default ~1.2 per city) worth roughly their shortest route, 4-20 pieces.
+    The result is a Board, so .cities / .connections / .tickets have the
+    same shape as city_w / connections_w and .graph() builds the WeightedGraph.
+    The same seed always gives the same board.
+    '''
+    rng = np.random.default_rng(seed)
+    n = n_cities
+    xy = rng.random((n, 2))
+
+    # codes AAA, AAB, ... (longer once 26^3 run out)
+    width = 3
+    while 26**width < n:
+        width += 1
+    codes = [''.join(chr(65 + i // 26**k % 26) for k in reversed(range(width))) for i in range(n)]
+
+    # k nearest neighbours, a block of rows at a time
+    pairs = set()
+    k = min(degree, n - 1)
+    for lo in range(0, n, 512):
+        d = ((xy[lo:lo+512, None, :] - xy[None, :, :])**2).sum(-1)
+        d[np.arange(d.shape[0]), np.arange(lo, lo + d.shape[0])] = np.inf
+        for i, row in enumerate(np.argpartition(d, k - 1, axis=1)[:, :k].tolist() if k else (), lo):
+            pairs.update((min(i, j), max(i, j)) for j in row)
+
+    # join stray components to the nearest city of the first one
+    parent = list(range(n))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for i, j in pairs:
+        parent[find(i)] = find(j)
+    roots = {find(i) for i in range(n)}
+    while len(roots) > 1:
+        main = np.array([find(i) for i in range(n)]) == find(0)
+        other = next(r for r in roots if r != find(0))
+        members = [i for i in range(n) if find(i) == other]
+        d = ((xy[members, None, :] - xy[None, main, :])**2).sum(-1)
+        a, b = np.unravel_index(np.argmin(d), d.shape)
+        i, j = members[a], int(np.flatnonzero(main)[b])
+        pairs.add((min(i, j), max(i, j)))
+        parent[find(i)] = find(j)
+        roots = {find(i) for i in range(n)}
+
+    # pieces from hop length: land mostly 1-4, sea 1-8 and skewed longer
+    pairs = sorted(pairs)
+    length = np.array([np.hypot(*(xy[i] - xy[j])) for i, j in pairs])
+    median = np.median(length) if len(length) else 1
+    rank = length.argsort().argsort() / max(len(pairs) - 1, 1)
+    is_sea = rng.random(len(pairs)) < np.clip(sea + (rank - 0.5) * 0.6, 0, 1)
+    scale = np.where(is_sea, 3.4, 2.4) * rng.uniform(0.7, 1.3, len(pairs))
+    weights = np.clip(np.rint(length / median * scale), 1, np.where(is_sea, 8, 6)).astype(int)
+
+    palette = ['w', 'g', 'r', 'y', 'p', 'b', 'db']
+    def color():
+        return 'any' if rng.random() < 0.15 else palette[rng.integers(len(palette))]
+    connections = []
+    for (i, j), w, t in zip(pairs, weights.tolist(), np.where(is_sea, 2, 1).tolist()):
+        first = color()
+        connections.append((codes[i], codes[j], w, t, first))
+        if rng.random() < parallel:
+            second = color()
+            while second == first != 'any':
+                second = color()
+            # doubles are mostly the same kind of route, sometimes land beside sea
+            t2 = t if rng.random() < 0.7 else 3 - t
+            connections.append((codes[i], codes[j], min(w, 6) if t2 == 1 else w, t2, second))
+
+    ports = {c for a, b, _, t, _ in connections if t == 2 for c in (a, b)}
+    cities = {code: {'name': f"City {code}", 'harbor': False, 'can_harbor': code in ports} for code in codes}
+    fixed = {code: (float(x), float(y)) for code, (x, y) in zip(codes, xy.tolist())}
+
+    # tickets: a random city, then a city about `target` pieces away from it
+    adjacency = [[] for _ in range(n)]
+    index = {code: i for i, code in enumerate(codes)}
+    for a, b, w, _, _ in connections:
+        adjacency[index[a]].append((index[b], w))
+        adjacency[index[b]].append((index[a], w))
+    tickets = []
+    for _ in range(round(1.2 * n) if n_tickets is None else n_tickets):
+        src, target = int(rng.integers(n)), int(rng.integers(4, 21))
+        dist, heap = {src: 0}, [(0, src)]
+        while heap: # Dijkstra, stopping past the target
+            d, u = heapq.heappop(heap)
+            if d > dist[u] or d > target:
+                continue
+            for v, w in adjacency[u]:
+                if d + w < dist.get(v, float('inf')):
+                    dist[v] = d + w
+                    heapq.heappush(heap, (d + w, v))
+        reach = [(abs(d - target), v) for v, d in dist.items() if v != src]
+        if not reach:
+            continue
+        best = min(reach)[0]
+        dst = [v for gap, v in reach if gap == best]
+        dst = dst[rng.integers(len(dst))]
+        value = max(1, dist[dst] + int(rng.integers(-2, 3)))
+        tickets.append((codes[src], codes[dst], value))
+
+    return Board(f"synthetic-{n}-{seed}", cities, connections, fixed, tickets)
 
 
 ## define iterations ##--------------------------------------------------------------------------------
@@ -983,8 +1834,63 @@ def bezier_curve(p0, p1, p2, t): # 3D
 def bezier_curve_2d(p0, p1, t):
     return (1 - t) * p0 + t * p1
 
-
-def graph3D(graph, cities, connections):
+def bezier_edges(graph, pos, spread, num_points=200, seed=0):
+    # every edge of graph as a quadratic Bezier through pos, in one batch:
+    # (edges, num_points, dim) points plus each edge's color and _type.
+    # The first edge between two cities is straight, the others bow out by
+    # an offset of up to +-spread so parallel routes stay visible; offsets
+    # come from `seed`, so the same graph always draws the same way.
+    edges = list(graph.edges(data=True))
+    p0 = np.array([pos[a] for a, _, _ in edges], dtype=float).reshape(len(edges), -1)
+    p2 = np.array([pos[b] for _, b, _ in edges], dtype=float).reshape(len(edges), -1)
+    seen, parallel = set(), np.zeros(len(edges), dtype=bool)
+    for i, (a, b, _) in enumerate(edges):
+        parallel[i] = (a, b) in seen
+        seen.update(((a, b), (b, a)))
+    offsets = np.random.default_rng(seed).uniform(-spread, spread, size=p0.shape)
+    p1 = (p0 + p2) / 2 + offsets * parallel[:, None]
+    t = np.linspace(0, 1, num_points)[None, :, None]
+    curves = bezier_curve(p0[:, None, :], p1[:, None, :], p2[:, None, :], t)
+    return curves, [d['color'] for _, _, d in edges], np.array([d['_type'] for _, _, d in edges])
+
+def board_layout(graph, fixed=None, dim=2, seed=0, iterations=50, cache_dir=CACHE_DIR):
+    '''
+    nx.spring_layout of a board graph (as built by graph2D / graph3D),
+    computed once and kept under cache_dir/layouts. The key covers the
+    graph content (cities plus every connection's weight, type and color),
+    the pinned positions (fixed_gl style), dim, seed and iterations, so a
+    changed board gets a fresh layout and repeat renders skip the work.
+    cache_dir=None always recomputes.
+    '''
+    import networkx as nx
+    fixed = fixed or {}
+    edges = sorted((min(a, b), max(a, b), d.get('weight'), d.get('_type'), d.get('color'))
+                   for a, b, d in graph.edges(data=True))
+    key = repr((sorted(graph.nodes), edges, sorted((c, tuple(xy)) for c, xy in fixed.items()), dim, seed, iterations))
+    path = None
+    if cache_dir:
+        path = os.path.join(cache_dir, 'layouts', hashlib.sha1(key.encode()).hexdigest()[:16] + '.npz')
+        try:
+            with np.load(path) as f:
+                return dict(zip(f['nodes'].tolist(), f['pos']))
+        except (OSError, KeyError, ValueError):
+            pass
+    pos = nx.spring_layout(graph, pos=fixed or None, fixed=list(fixed) or None,
+                           dim=dim, seed=seed, iterations=iterations)
+    if path:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, nodes=np.array(list(pos)), pos=np.array(list(pos.values())))
+        os.replace(tmp, path)
+    return pos
+
+
+def graph3D(graph, cities, connections, show=True, seed=70):
+    # show=False leaves the figure open and returns it (for saving or timing)
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d.art3d import Line3DCollection
     fig = plt.figure()
     ax = fig.add_subplot(111, projection='3d')
 
@@ -998,59 +1904,32 @@ def graph3D(graph, cities, connections):
         graph.add_edge(city1, city2, weight=weight, _type=_type, color=colors[color])
 
     # get pos from viz
-    pos = nx.spring_layout(graph, dim=3, seed=70)
-
-    # rescale length to reflect weight
-    """ for edge in world_map_graph.edges(data=True):
-        weight = edge[2]['weight']
-        scale_factor = weight / 2  # Adjust the scaling factor as needed
-
-        # Rescale node positions
-        pos[edge[0]] = [pos[edge[0]][0] * scale_factor, pos[edge[0]][1] * scale_factor, pos[edge[0]][2]]
-        pos[edge[1]] = [pos[edge[1]][0] * scale_factor, pos[edge[1]][1] * scale_factor, pos[edge[1]][2]]
-    """
+    pos = board_layout(graph, dim=3, seed=seed)
 
     #nodes gotten from layout
+    xyz = np.array(list(pos.values()))
+    ax.scatter(xyz[:, 0], xyz[:, 1], xyz[:, 2], c='b', marker='x', sizes=[8])
     for node, (x, y, z) in pos.items():
-        ax.scatter(x, y, z, c='b', marker='x', label=node, sizes=[8])
         ax.text(x, y, z, node, fontsize=8, color='black')
 
-    # Draw edges
-    double_edges=set()
-    for edge in graph.edges(data=True):
-
-        weight = edge[2]['weight']
-        num_points = 200
-        t = np.linspace(0, 1, num_points)
-
-        p0 = np.array([pos[edge[0]][0], pos[edge[0]][1], pos[edge[0]][2]])
-        p2 = np.array([pos[edge[1]][0], pos[edge[1]][1], pos[edge[1]][2]])
-        p1 = (p0 + p2) / 2
-
-        # if there exist two or more edges between two nodes
-        if(edge[0],edge[1]) in double_edges or (edge[1],edge[0]) in double_edges:
-            # Midpoint as control point with an offset in the x-direction
-            offset_amount = np.random.uniform(-0.10,0.10,size=3)  # You can adjust this value
-            p1 = (p0 + p2) / 2 + np.array(offset_amount)
-        else:
-            double_edges.add((edge[0],edge[1]))
-            double_edges.add((edge[1],edge[0]))   
-
-        # Define the Bezier curve for each coordinate
-        x_curve = bezier_curve(p0[0], p1[0], p2[0], t)
-        y_curve = bezier_curve(p0[1], p1[1], p2[1], t)
-        z_curve = bezier_curve(p0[2], p1[2], p2[2], t)
-        curves = Line3DCollection([list(zip(x_curve, y_curve, z_curve))], colors=edge[2]['color'], alpha=0.5)    
-        ax.add_collection3d(curves)
+    # Draw edges, all in one collection
+    curves, edge_colors, _ = bezier_edges(graph, pos, 0.10, seed=seed)
+    ax.add_collection3d(Line3DCollection(curves, colors=edge_colors, alpha=0.5))
 
     background_color = 'white'
     ax.xaxis.set_pane_color(mpl.colors.to_rgba(background_color))
     ax.yaxis.set_pane_color(mpl.colors.to_rgba(background_color))
     ax.zaxis.set_pane_color(mpl.colors.to_rgba(background_color))
 
-    plt.show()
+    if show:
+        plt.show()
+    return fig
 
-def graph2D(graph, cities, connections, fixed_nodes):
+def graph2D(graph, cities, connections, fixed_nodes, show=True, seed=0):
+    # show=False leaves the figure open and returns it (for saving or timing)
+    import networkx as nx
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
     fig = plt.figure()
     ax = fig.subplots()
     for id, city in cities.items():
@@ -1063,40 +1942,117 @@ def graph2D(graph, cities, connections, fixed_nodes):
     for edge in graph.edges:
         graph.edges[edge]['length']=1/graph.edges[edge]['weight']
     # get pos from viz
-    pos = nx.spring_layout(graph, pos=fixed_nodes, fixed=fixed_nodes.keys(), iterations=100)
-
-
-    double_edges=set()
-    for edge in graph.edges(data=True):
-
-        weight = edge[2]['weight']
-        num_points = 200
-        t = np.linspace(0, 1, num_points)
-
-        p0 = np.array([pos[edge[0]][0], pos[edge[0]][1]])
-        p2 = np.array([pos[edge[1]][0], pos[edge[1]][1]])
-        p1 = (p0 + p2) / 2
-
-        # if there exist two or more edges between two nodes
-        if(edge[0],edge[1]) in double_edges or (edge[1],edge[0]) in double_edges:
-            # Midpoint as control point with an offset in the x-direction
-            offset_amount = np.random.uniform(-0.30,0.30,size=2)  # You can adjust this value
-            p1 = (p0 + p2) / 2 + np.array(offset_amount)
-        else:
-            double_edges.add((edge[0], edge[1]))
-            double_edges.add((edge[1], edge[0]))
-
-        # Define the Bezier curve for each coordinate
-        x_curve = bezier_curve(p0[0], p1[0], p2[0], t)
-        y_curve = bezier_curve(p0[1], p1[1], p2[1], t)
-
-        curves = mpl.collections.LineCollection([list(zip(x_curve, y_curve))], colors=edge[2]['color'], alpha=0.5, linestyle='solid' if edge[2]['_type']==1 else 'dashed')
-        ax.add_collection(curves)
+    pos = board_layout(graph, fixed_nodes, seed=seed, iterations=100)
+
+    # one collection per line style: solid land, dashed sea
+    curves, edge_colors, types = bezier_edges(graph, pos, 0.30, seed=seed)
+    for _type, style in ((1, 'solid'), (2, 'dashed')):
+        keep = np.flatnonzero(types == _type)
+        ax.add_collection(mpl.collections.LineCollection(
+            curves[keep], colors=[edge_colors[i] for i in keep], alpha=0.5, linestyle=style))
     # draw nodes
     nx.draw_networkx_nodes(graph, pos, node_size=25)
-    """ # draw edges
-    for edge in graph.edges(data=True): # split into a, b, data['x': 'y', ...]
-        nx.draw_networkx_edges(graph, pos, edgelist=[(edge[0],edge[1])], edge_color=edge[2]['color']) """
 
     nx.draw_networkx_labels(graph, pos)
-    plt.show()
\ No newline at end of file
+    if show:
+        plt.show()
+    return fig
+
+
+## batch rendering ## -----------------------------------------------------------
+_worker_map = None
+
+def _init_render_worker(base):
+    # pool initializer: draw the faded board once, jobs only swap the overlay
+    global _worker_map
+    from matplotlib.figure import Figure # no pyplot: headless whatever the backend
+    from matplotlib.collections import LineCollection
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    pos, curves, edge_colors, types, edge_index, options = base
+    fig = Figure(figsize=options['figsize'], dpi=options['dpi'])
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    for _type, style in ((1, 'solid'), (2, 'dashed')):
+        keep = np.flatnonzero(types == _type)
+        ax.add_collection(LineCollection(curves[keep], colors=[edge_colors[i] for i in keep],
+                                         alpha=0.15, linestyle=style))
+    xy = np.array(list(pos.values()))
+    ax.scatter(xy[:, 0], xy[:, 1], s=12, zorder=3)
+    for node, (x, y) in pos.items():
+        ax.text(x, y, node, fontsize=7, ha='center', va='bottom', zorder=4)
+    ax.set_axis_off()
+    if options['raster']:
+        # png & co: rasterize the base once; jobs draw only the overlay on a
+        # transparent figure and blend it over these pixels
+        fig.canvas.draw()
+        options['base'] = np.asarray(fig.canvas.buffer_rgba())[..., :3].copy()
+        position, limits = ax.get_position(), (ax.get_xlim(), ax.get_ylim())
+        fig = Figure(figsize=options['figsize'], dpi=options['dpi'])
+        FigureCanvasAgg(fig)
+        fig.patch.set_alpha(0)
+        ax = fig.add_axes(position)
+        ax.set_xlim(limits[0])
+        ax.set_ylim(limits[1])
+        ax.set_axis_off()
+    _worker_map = (fig, ax, LineCollection, curves, edge_colors, types, edge_index, options)
+
+def _render_job(job):
+    fig, ax, LineCollection, curves, edge_colors, types, edge_index, options = _worker_map
+    path, title, routes = job
+    idx = [edge_index[tuple(step)] for route in routes for step in route['path']]
+    overlay = []
+    for _type, style in ((1, 'solid'), (2, 'dashed')):
+        keep = [i for i in idx if types[i] == _type]
+        if keep:
+            overlay.append(ax.add_collection(LineCollection(curves[keep], colors=[edge_colors[i] for i in keep],
+                                                            linewidths=3, alpha=0.9, linestyle=style)))
+    ax.set_title(title)
+    if options['raster']:
+        from PIL import Image
+        fig.canvas.draw()
+        top = np.asarray(fig.canvas.buffer_rgba())
+        hit = top[..., 3] != 0 # the overlay is sparse, blend only where it drew
+        pixels = options['base'].copy()
+        alpha = top[hit, 3:].astype(np.uint16)
+        pixels[hit] = (top[hit, :3] * alpha + pixels[hit] * (255 - alpha)) // 255
+        Image.fromarray(pixels).save(path, compress_level=1)
+    else:
+        fig.savefig(path, dpi=options['dpi'])
+    for artist in overlay:
+        artist.remove()
+    return path
+
+def render_routes(board, jobs, directory, fmt='png', processes=None, dpi=100, figsize=(10, 7), seed=0):
+    '''
+    Headless batch rendering: one image per job showing the board faded
+    with the job's routes drawn over it. board is a Board or a name for
+    load_board; jobs is a list of (name, routes) with routes as returned by
+    get_sorted_paths / all_paths / get_shortest_path. The layout and every
+    edge curve are computed once here; each worker process draws the base
+    map once and then only swaps the overlay per image (processes=1 renders
+    in this process). Writes directory/<name>.<fmt> (png, svg, ...) and
+    returns the file paths in job order.
+    '''
+    import networkx as nx
+    if not isinstance(board, Board):
+        board = load_board(board)
+    graph = nx.MultiGraph()
+    graph.add_nodes_from(board.cities)
+    for city1, city2, weight, _type, color in board.connections:
+        graph.add_edge(city1, city2, weight=weight, _type=_type, color=colors[color], code=color)
+    pos = {node: tuple(xy) for node, xy in board_layout(graph, board.fixed, seed=seed, iterations=100).items()}
+    curves, edge_colors, types = bezier_edges(graph, pos, 0.30, seed=seed)
+    edge_index = {} # route step (a, b, weight, type, color code) -> curve, either direction
+    for i, (a, b, d) in enumerate(graph.edges(data=True)):
+        edge_index.setdefault((a, b, d['weight'], d['_type'], d['code']), i)
+        edge_index.setdefault((b, a, d['weight'], d['_type'], d['code']), i)
+
+    os.makedirs(directory, exist_ok=True)
+    work = [(os.path.join(directory, f"{name}.{fmt}"), name, routes) for name, routes in jobs]
+    options = {'dpi': dpi, 'figsize': figsize, 'raster': fmt not in ('svg', 'pdf', 'eps', 'ps')}
+    base = (pos, curves, edge_colors, types, edge_index, options)
+    if processes == 1:
+        _init_render_worker(base)
+        return [_render_job(job) for job in work]
+    with multiprocessing.Pool(processes, initializer=_init_render_worker, initargs=(base,)) as pool:
+        return pool.map(_render_job, work, chunksize=max(1, len(work) // (4 * (processes or os.cpu_count() or 1))))